@@ -0,0 +1,174 @@
+import argparse
+import collections
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from logic import ConnectN, PLAYER_X, PLAYER_O, ROWS, COLS
+
+# Accepted input lines (blank lines and '#' comments are skipped):
+#   3342                 one digit per move, for boards up to 10 columns
+#   3 3 4 2  or  3,3,4,2 moves separated by spaces or commas
+#   ..../..../.XO.       rows top-down separated by '/', see ConnectN.load_position
+#   {"moves": [3, 3]}    JSON with "moves" or "position", plus optional
+#                        "id", "n", "rows" and "cols"; tournament.py records work as is
+
+
+def read_lines(path):
+    """Lines of 'path' ('-' for stdin), read lazily."""
+    if path == "-":
+        yield from sys.stdin
+        return
+    with open(path) as f:
+        yield from f
+
+
+def parse_positions(lines, n=4, rows=ROWS, cols=COLS):
+    """Turn input lines into analysis jobs, one at a time."""
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        job = {"id": number, "n": n, "rows": rows, "cols": cols}
+        try:
+            if line.startswith("{"):
+                record = json.loads(line)
+                job["id"] = record.get("id", record.get("game", number))
+                for key in ("n", "rows", "cols"):
+                    job[key] = record.get(key, job[key])
+                    if type(job[key]) is not int:
+                        raise TypeError(f"'{key}' must be an integer")
+                if "position" in record:
+                    if not isinstance(record["position"], str):
+                        raise TypeError("'position' must be a string")
+                    job["position"] = record["position"]
+                else:
+                    job["moves"] = [int(col) for col in record["moves"]]
+            elif "/" in line:
+                job["position"] = line
+            elif " " in line or "," in line:
+                job["moves"] = [int(col) for col in line.replace(",", " ").split()]
+            else:
+                job["moves"] = [int(ch) for ch in line]
+        except (ValueError, KeyError, TypeError) as e:
+            job["error"] = f"unreadable line: {e}"
+        yield job
+
+
+# ---------- worker side ----------
+_engines = {}
+
+
+def _analysis_engine(n, rows, cols, bot, tt_size):
+    """One engine per geometry and side, reused so its TT stays warm."""
+    spec = (n, rows, cols, bot)
+    if spec not in _engines:
+        _engines[spec] = ConnectN(n=n, rows=rows, cols=cols, bot_player=bot,
+                                  tt_size=tt_size, seed=0)
+    return _engines[spec]
+
+
+def analyse(job, depth=None, time_limit=None, tt_size=1 << 20):
+    """Search one job's position; returns the output record."""
+    result = {"id": job["id"]}
+    if "error" in job:
+        result["error"] = job["error"]
+        return result
+    try:
+        # set up on a scratch engine first to learn the side to move
+        game = _analysis_engine(job["n"], job["rows"], job["cols"], PLAYER_X, tt_size)
+        if "position" in job:
+            game.load_position(job["position"])
+        else:
+            game.load_moves(job["moves"])
+        bot = game.side_to_move(game.board)
+        if bot != PLAYER_X:
+            board = game.board
+            game = _analysis_engine(job["n"], job["rows"], job["cols"], bot, tt_size)
+            game.board = board
+            game.sync_evaluator()
+    except (ValueError, AssertionError) as e:
+        result["error"] = str(e) or "invalid position"
+        return result
+
+    result["to_move"] = "X" if bot == PLAYER_X else "O"
+    for player, name in ((PLAYER_X, "X"), (PLAYER_O, "O")):
+        if game.check_win(game.board, player):
+            result["winner"] = name
+            return result
+    if game.is_draw(game.board):
+        result["winner"] = None
+        return result
+
+    if depth is not None:
+        game.depth = depth
+    move = game.find_best_move(time_limit=time_limit, max_depth=depth if time_limit else None)
+    stats = game.stats
+    value = stats.value
+    if value is not None and math.isinf(value):
+        value = "win" if value > 0 else "loss"
+    result.update(
+        best_move=move,
+        score=value,
+        depth=stats.depth,
+        nodes=stats.nodes,
+        time=stats.elapsed,
+        nps=stats.nps,
+        pv=stats.pv,
+    )
+    return result
+
+
+# ---------- driver ----------
+def run_analysis(jobs, depth=None, time_limit=None, workers=1, window=None):
+    """Yield one result per job, in input order.
+
+    At most 'window' jobs are in flight, so memory use does not grow with
+    the input however long it is.
+    """
+    if workers <= 1:
+        for job in jobs:
+            yield analyse(job, depth, time_limit)
+        return
+    window = window or 4 * workers
+    with ProcessPoolExecutor(workers) as pool:
+        pending = collections.deque()
+        for job in jobs:
+            pending.append(pool.submit(analyse, job, depth, time_limit))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyse Connect-N positions in bulk.")
+    parser.add_argument("input", nargs="?", default="-", help="input file, '-' for stdin")
+    parser.add_argument("-o", "--out", default="-", help="JSONL output, '-' for stdout")
+    parser.add_argument("--n", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=ROWS)
+    parser.add_argument("--cols", type=int, default=COLS)
+    parser.add_argument("--depth", type=int, default=None,
+                        help="search depth (default 5; with --time, the deepest iteration)")
+    parser.add_argument("--time", type=float, default=None, help="seconds per position")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    jobs = parse_positions(read_lines(args.input), args.n, args.rows, args.cols)
+    out = sys.stdout if args.out == "-" else open(args.out, "w")
+    count = errors = 0
+    start = time.perf_counter()
+    try:
+        for result in run_analysis(jobs, args.depth, args.time, args.workers):
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+            count += 1
+            errors += "error" in result
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"{count} positions ({errors} errors) in {time.perf_counter() - start:.1f}s",
+          file=sys.stderr)
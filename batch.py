@@ -0,0 +1,83 @@
+from logic import Bitboard, PLAYER_X, PLAYER_O, cell_bit
+
+# numpy is optional: only batched evaluation needs it
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("batched evaluation requires numpy (pip install numpy)")
+
+
+class BatchEvaluator:
+    """Vectorised evaluate_board for many boards of one geometry.
+
+    Boards are stacked into an (n_boards, rows, cols) int8 array; every
+    window is gathered by index and scored by a lookup on its pattern
+    (x count, o count), so there is no Python call per board.
+    """
+
+    def __init__(self, game):
+        _require_numpy()
+        self.rows, self.cols, self.n = game.rows, game.cols, game.n
+        n = self.n
+        # (n_windows, n) flat cell indices
+        self.window_index = np.array(
+            [[r * self.cols + c for r, c in cells] for cells in game.windows],
+            dtype=np.intp)
+        # window pattern code = x_count * (n + 1) + o_count
+        size = (n + 1) * (n + 1)
+        self.table = {PLAYER_X: np.zeros(size, np.int64), PLAYER_O: np.zeros(size, np.int64)}
+        for x in range(n + 1):
+            for o in range(n + 1 - x):
+                code = x * (n + 1) + o
+                self.table[PLAYER_X][code] = game.score_counts(x, o, n - x - o)
+                self.table[PLAYER_O][code] = game.score_counts(o, x, n - x - o)
+        # bit of each list cell in a bitboard mask, row-major
+        self.cell_bits = np.array(
+            [cell_bit(self.rows, r, c) for r in range(self.rows) for c in range(self.cols)],
+            dtype=np.intp)
+        self.mask_bytes = (self.cols * (self.rows + 1) + 7) // 8
+
+    def to_array(self, boards):
+        """Stack list-of-lists boards or Bitboards into an int8 array."""
+        boards = list(boards)
+        if boards and isinstance(boards[0], Bitboard):
+            return self.masks_to_array([b.masks[PLAYER_X] for b in boards],
+                                       [b.masks[PLAYER_O] for b in boards])
+        return np.array(boards, dtype=np.int8).reshape(len(boards), self.rows, self.cols)
+
+    def masks_to_array(self, masks_x, masks_o):
+        """Unpack parallel lists of bitboard masks into an int8 array."""
+        def unpack(masks):
+            raw = b"".join(m.to_bytes(self.mask_bytes, "little") for m in masks)
+            bits = np.unpackbits(np.frombuffer(raw, dtype=np.uint8), bitorder="little")
+            return bits.reshape(len(masks), -1)[:, self.cell_bits].astype(np.int8)
+
+        cells = unpack(masks_x) * PLAYER_X + unpack(masks_o) * PLAYER_O
+        return cells.reshape(len(masks_x), self.rows, self.cols)
+
+    def evaluate(self, boards, player):
+        """Heuristic score of every board in an (n_boards, rows, cols) array."""
+        boards = np.asarray(boards, dtype=np.int8)
+        flat = boards.reshape(len(boards), -1)
+        windows = flat[:, self.window_index]  # (n_boards, n_windows, n)
+        code = (windows == PLAYER_X).sum(axis=2) * (self.n + 1) + (windows == PLAYER_O).sum(axis=2)
+        scores = self.table[player][code].sum(axis=1)
+        center = (boards[:, :, self.cols // 2] == player).sum(axis=1)
+        return scores + center * 3
+
+    def evaluate_stream(self, boards, player, chunk_size=65536):
+        """Yield scores for an iterable of boards, 'chunk_size' at a time."""
+        chunk = []
+        for board in boards:
+            chunk.append(board)
+            if len(chunk) == chunk_size:
+                yield from self.evaluate(self.to_array(chunk), player).tolist()
+                chunk = []
+        if chunk:
+            yield from self.evaluate(self.to_array(chunk), player).tolist()
+
@@ -0,0 +1,161 @@
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import time
+
+from logic import ConnectN, ROWS, COLS
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_positions.json")
+COMPARED_META = ("variant", "depths", "seed")  # settings a baseline must share
+
+# engine configurations that can be benchmarked against each other
+VARIANTS = {
+    "default": {},
+    "no-ordering": {"move_ordering": False},
+    "no-tt": {"tt_size": 0},
+    "list-board": {"bitboard": False},
+    "pvs": {"search_core": "pvs"},
+}
+
+
+def load_corpus(path=CORPUS, ns=None, phases=None):
+    with open(path) as f:
+        positions = json.load(f)["positions"]
+    return [p for p in positions
+            if (not ns or p["n"] in ns) and (not phases or p["phase"] in phases)]
+
+
+def _json_value(value):
+    if value is not None and math.isinf(value):
+        return "inf" if value > 0 else "-inf"
+    return value
+
+
+def run_position(position, depth, variant="default", seed=0):
+    """Search one corpus position to 'depth' on a fresh engine."""
+    game = ConnectN(n=position["n"], search_depth=depth, seed=seed,
+                    rows=position.get("rows", ROWS), cols=position.get("cols", COLS),
+                    **VARIANTS[variant])
+    game.load_moves(position["moves"])
+    game.bot = game.side_to_move(game.board)
+    start = time.perf_counter()
+    move = game.find_best_move()
+    elapsed = time.perf_counter() - start
+    return {
+        "name": position["name"],
+        "n": position["n"],
+        "phase": position["phase"],
+        "depth": depth,
+        "move": move,
+        "value": _json_value(game.best_value),
+        "nodes": game.nodes,
+        "time": elapsed,
+        "nps": game.nodes / elapsed if elapsed else 0.0,
+        "branching_factor": game.stats.branching_factor,
+        "pv": game.stats.pv,
+    }
+
+
+def run_benchmark(positions, depths, variant="default", seed=0, log=None):
+    results = []
+    for position in positions:
+        for depth in depths:
+            result = run_position(position, depth, variant, seed)
+            results.append(result)
+            if log:
+                log(f"{result['name']:<16} d={depth:<2} move={result['move']} "
+                    f"nodes={result['nodes']:<9} {result['time']:8.3f}s "
+                    f"{result['nps']:10.0f} nps")
+    nodes = sum(r["nodes"] for r in results)
+    elapsed = sum(r["time"] for r in results)
+    per_depth = {}
+    for r in results:
+        entry = per_depth.setdefault(str(r["depth"]), {"nodes": 0, "time": 0.0})
+        entry["nodes"] += r["nodes"]
+        entry["time"] += r["time"]
+    return {
+        "meta": {
+            "variant": variant,
+            "depths": list(depths),
+            "seed": seed,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+        "summary": {
+            "positions": len(positions),
+            "nodes": nodes,
+            "time": elapsed,
+            "nps": nodes / elapsed if elapsed else 0.0,
+            "per_depth": per_depth,
+        },
+    }
+
+
+def compare(report, baseline, tolerance=0.2):
+    """Return a list of regressions of 'report' against 'baseline'.
+
+    Raises ValueError if the two were run with different settings, since
+    their moves and node counts are then not comparable.
+    """
+    for key in COMPARED_META:
+        ours, theirs = report["meta"].get(key), baseline.get("meta", {}).get(key)
+        if ours != theirs:
+            raise ValueError(f"baseline was run with {key}={theirs}, this run with {key}={ours}")
+    problems = []
+    expected = {(r["name"], r["depth"]): r for r in baseline["results"]}
+    for r in report["results"]:
+        base = expected.get((r["name"], r["depth"]))
+        if base is not None and base["move"] != r["move"]:
+            problems.append(f"{r['name']} depth {r['depth']}: move {r['move']} "
+                            f"(baseline {base['move']})")
+    base_nps = baseline["summary"]["nps"]
+    nps = report["summary"]["nps"]
+    if base_nps and nps < base_nps * (1 - tolerance):
+        problems.append(f"nodes/sec dropped to {nps:.0f} from {base_nps:.0f} "
+                        f"(more than {tolerance:.0%})")
+    return problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark ConnectN search on a fixed corpus.")
+    parser.add_argument("--depths", type=int, nargs="+", default=[4, 6, 8])
+    parser.add_argument("--n", type=int, nargs="+", help="only these N")
+    parser.add_argument("--phase", nargs="+", choices=["opening", "midgame", "endgame"])
+    parser.add_argument("--variant", choices=sorted(VARIANTS), default="default")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--baseline", help="fail on regressions against this report")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed nodes/sec drop versus the baseline (fraction)")
+    parser.add_argument("-q", "--quiet", action="store_true")
+    args = parser.parse_args()
+
+    positions = load_corpus(args.corpus, args.n, args.phase)
+    report = run_benchmark(positions, args.depths, args.variant, args.seed,
+                           log=None if args.quiet else print)
+    summary = report["summary"]
+    print(f"{summary['positions']} positions, {summary['nodes']} nodes, "
+          f"{summary['time']:.2f}s, {summary['nps']:.0f} nodes/sec")
+    for depth, entry in summary["per_depth"].items():
+        print(f"  depth {depth}: {entry['nodes']} nodes, {entry['time']:.3f}s")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=1)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        try:
+            problems = compare(report, baseline, args.tolerance)
+        except ValueError as e:
+            print("NOT COMPARABLE:", e)
+            sys.exit(2)
+        for problem in problems:
+            print("REGRESSION:", problem)
+        sys.exit(1 if problems else 0)
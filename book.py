@@ -0,0 +1,167 @@
+import argparse
+import math
+import mmap
+import os
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from logic import ConnectN, PLAYER_X, ROWS, COLS
+
+# file layout: header, then entries sorted by key
+#   header: magic, version, n, rows, cols, max ply, search depth, entry count
+#   entry:  canonical Zobrist key (the lesser of the key and its mirror),
+#           value (side-to-move POV), move for the canonical orientation, depth
+HEADER = struct.Struct("<4sHBBBBBxI")
+ENTRY = struct.Struct("<QibB2x")
+MAGIC = b"CNBK"
+VERSION = 2  # 2: canonical keys
+VALUE_INF = (1 << 31) - 1
+BOOK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "books")
+
+
+def book_path(n, book_dir=BOOK_DIR, rows=ROWS, cols=COLS):
+    if (rows, cols) == (ROWS, COLS):
+        return os.path.join(book_dir, f"connect{n}.book")
+    return os.path.join(book_dir, f"connect{n}_{rows}x{cols}.book")
+
+
+class OpeningBook:
+    """Read-only opening book, memory-mapped and searched by binary search.
+
+    Nothing is loaded up front: lookups unpack single entries straight from
+    the mapped file, so opening a book costs the same whatever its size.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.n, self.rows, self.cols, self.ply, self.depth, self.count = \
+            HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.mm.close()
+            raise ValueError(f"{path} is not a Connect-N opening book")
+
+    @classmethod
+    def open_default(cls, n, book_dir=BOOK_DIR, rows=ROWS, cols=COLS):
+        """The book for 'n' on a rows x cols board, or None if it has not been built."""
+        path = book_path(n, book_dir, rows, cols)
+        return cls(path) if os.path.exists(path) else None
+
+    def matches(self, game):
+        return (self.n, self.rows, self.cols) == (game.n, game.rows, game.cols)
+
+    def lookup(self, key):
+        """Return (move, value, depth) stored for 'key', or None."""
+        mm, lo, hi = self.mm, 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            entry_key, value, move, depth = ENTRY.unpack_from(mm, HEADER.size + mid * ENTRY.size)
+            if entry_key < key:
+                lo = mid + 1
+            elif entry_key > key:
+                hi = mid
+            else:
+                if abs(value) == VALUE_INF:
+                    value = math.copysign(math.inf, value)
+                return move, value, depth
+        return None
+
+    def close(self):
+        self.mm.close()
+
+
+# ---------- builder ----------
+def book_positions(n, max_ply, rows=ROWS, cols=COLS):
+    """Every non-terminal position reachable in at most 'max_ply' plies, by
+    canonical key, so a position and its mirror image are searched once."""
+    game = ConnectN(n=n, tt_size=0, move_ordering=False, incremental_eval=False,
+                    rows=rows, cols=cols)
+    board = game.board
+    positions = {}
+
+    def walk(ply, player):
+        key = board.canonical_key()[0]
+        if key in positions:
+            return
+        positions[key] = (board.copy(), player)
+        if ply == max_ply:
+            return
+        for col in board.valid_moves():
+            board.drop(col, player)
+            if not game.check_win_at(board, col):
+                walk(ply + 1, -player)
+            board.undo(col)
+
+    walk(0, PLAYER_X)
+    return positions
+
+
+def _search_position(n, rows, cols, depth, time_limit, board, player):
+    game = _builder_engine(n, rows, cols, depth, player)
+    game.board = board
+    game.sync_evaluator()
+    move = game.find_best_move(time_limit=time_limit)
+    key, mirrored = board.canonical_key()
+    if mirrored:
+        move = cols - 1 - move
+    return key, move, game.best_value, game.completed_depth or depth
+
+
+_engines = {}
+
+
+def _builder_engine(n, rows, cols, depth, player):
+    # one engine per side to move, so each keeps its TT across positions
+    spec = (n, rows, cols, depth, player)
+    if spec not in _engines:
+        _engines[spec] = ConnectN(n=n, search_depth=depth, bot_player=player, tt_size=1 << 20,
+                                  seed=0, rows=rows, cols=cols)
+    return _engines[spec]
+
+
+def build_book(n, max_ply, depth, path, time_limit=None, workers=1, rows=ROWS, cols=COLS):
+    """Search every position up to 'max_ply' and write the sorted book file."""
+    positions = book_positions(n, max_ply, rows, cols)
+    jobs = [(n, rows, cols, depth, time_limit, board, player)
+            for board, player in positions.values()]
+    if workers > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(_search_position, *zip(*jobs), chunksize=8))
+    else:
+        results = [_search_position(*job) for job in jobs]
+
+    results.sort()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, n, rows, cols, max_ply, depth, len(results)))
+        for key, move, value, searched in results:
+            if math.isinf(value):
+                value = int(math.copysign(VALUE_INF, value))
+            f.write(ENTRY.pack(key, int(value), move, searched))
+    return len(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build Connect-N opening books.")
+    parser.add_argument("--n", type=int, action="append",
+                        help="N to build (repeatable, default: 3 to 6)")
+    parser.add_argument("--rows", type=int, default=ROWS)
+    parser.add_argument("--cols", type=int, default=COLS)
+    parser.add_argument("--ply", type=int, default=4, help="deepest book ply")
+    parser.add_argument("--depth", type=int, default=10, help="search depth per position")
+    parser.add_argument("--time", type=float, default=None,
+                        help="seconds per position (iterative deepening) instead of fixed depth")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--dir", default=BOOK_DIR, help="output directory")
+    args = parser.parse_args()
+
+    for n in args.n or [3, 4, 5, 6]:
+        if not 3 <= n <= max(args.rows, args.cols):
+            parser.error(f"N={n} does not fit a {args.rows}x{args.cols} board")
+        start = time.perf_counter()
+        path = book_path(n, args.dir, args.rows, args.cols)
+        count = build_book(n, args.ply, args.depth, path, args.time, args.workers,
+                           args.rows, args.cols)
+        print(f"N={n}: {count} positions -> {path} ({time.perf_counter() - start:.1f}s)")
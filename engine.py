@@ -0,0 +1,263 @@
+import math
+import subprocess
+import sys
+import threading
+
+from logic import ConnectN, ROWS, COLS
+
+# Line protocol, one command per line on stdin:
+#   isready                           -> readyok
+#   newgame [n=4] [depth=5] [rows=6] [cols=7]
+#   position [moves <col> <col> ...]  (X moves first)
+#   go [movetime <ms>] [nodes <n>] [depth <d>] [infinite]
+#                                     -> info ... lines, then bestmove <col>
+#   stop                              ends the running search early
+#   quit
+# newgame/position/go sent during a search wait for it to finish (an
+# infinite search is stopped first), so commands can be piped in blindly.
+# Errors are reported as 'error <message>' and leave the state unchanged.
+
+
+class EngineServer:
+    """Long-lived engine answering the line protocol above.
+
+    One ConnectN per geometry is kept for the life of the process, so the
+    transposition table, move-ordering history and cached window tables
+    stay warm across games and positions.
+    """
+
+    def __init__(self, stdin=None, stdout=None, tt_size=1 << 20):
+        self.stdin = stdin or sys.stdin
+        self.stdout = stdout or sys.stdout
+        self.tt_size = tt_size
+        self.engines = {}  # (n, rows, cols) -> ConnectN
+        self.game = None
+        self.stop_event = threading.Event()
+        self.search_thread = None
+        self.infinite = False
+        self.output_lock = threading.Lock()
+        self.new_game({})
+
+    def send(self, line):
+        with self.output_lock:
+            self.stdout.write(line + "\n")
+            self.stdout.flush()
+
+    def searching(self):
+        return self.search_thread is not None and self.search_thread.is_alive()
+
+    def run(self):
+        for line in self.stdin:
+            if not self.handle(line):
+                break
+        self.stop()
+
+    def handle(self, line):
+        """Run one command; return False on quit."""
+        words = line.split()
+        if not words:
+            return True
+        command, args = words[0], words[1:]
+        if command == "quit":
+            return False
+        if command == "isready":
+            self.send("readyok")
+        elif command == "stop":
+            self.stop()
+        elif command in ("newgame", "position", "go"):
+            self.wait()
+            try:
+                if command == "newgame":
+                    self.new_game(parse_options(args))
+                elif command == "position":
+                    self.position(args)
+                else:
+                    self.go(args)
+            except ValueError as e:
+                self.send(f"error {e}")
+        else:
+            self.send(f"error unknown command {command}")
+        return True
+
+    # ---------- commands ----------
+    def new_game(self, options):
+        n = int(options.pop("n", 4))
+        depth = int(options.pop("depth", 5))
+        rows = int(options.pop("rows", ROWS))
+        cols = int(options.pop("cols", COLS))
+        if options:
+            raise ValueError(f"unknown option {next(iter(options))}")
+        if not (rows > 0 and cols > 0 and 3 <= n <= max(rows, cols)):
+            raise ValueError(f"N={n} does not fit a {rows}x{cols} board")
+        if depth < 1:
+            raise ValueError("depth must be at least 1")
+        spec = (n, rows, cols)
+        if spec not in self.engines:
+            game = ConnectN(n=n, rows=rows, cols=cols, tt_size=self.tt_size, seed=0)
+            game.stop_event = self.stop_event
+            self.engines[spec] = game
+        self.game = self.engines[spec]
+        self.game.depth = depth
+        self.game.load_moves([])
+        self.game.bot = self.game.side_to_move(self.game.board)
+
+    def position(self, args):
+        moves = []
+        if args:
+            if args[0] != "moves":
+                raise ValueError("expected: position moves <col> ...")
+            moves = [int(col) for col in args[1:]]
+        previous = list(self.game.moves)
+        try:
+            self.game.load_moves(moves)
+        except ValueError:
+            # load_moves leaves the board half replayed; put the old position back
+            self.game.load_moves(previous)
+            raise
+        self.game.bot = self.game.side_to_move(self.game.board)
+
+    def go(self, args):
+        time_limit, node_limit, max_depth = math.inf, None, self.game.depth
+        i = 0
+        while i < len(args):
+            name = args[i]
+            if name == "infinite":
+                max_depth = None
+                i += 1
+                continue
+            if i + 1 >= len(args):
+                raise ValueError(f"go {name} needs a value")
+            value = int(args[i + 1])
+            if name == "movetime":
+                time_limit, max_depth = value / 1000.0, None
+            elif name == "nodes":
+                node_limit, max_depth = value, None
+            elif name == "depth":
+                max_depth = value
+            else:
+                raise ValueError(f"unknown go option {name}")
+            i += 2
+        if self.game.game_over():
+            raise ValueError("game is over")
+        self.infinite = time_limit == math.inf and node_limit is None and max_depth is None
+        self.stop_event.clear()
+        self.search_thread = threading.Thread(
+            target=self.think, args=(time_limit, node_limit, max_depth), daemon=True)
+        self.search_thread.start()
+
+    def think(self, time_limit, node_limit, max_depth):
+        # an unbounded deadline still runs iterative deepening, so stop works
+        move = self.game.find_best_move(time_limit=time_limit, node_limit=node_limit,
+                                        max_depth=max_depth, callback=self.info)
+        self.send(f"bestmove {move}")
+
+    def stop(self):
+        if self.searching():
+            self.stop_event.set()
+            self.search_thread.join()
+
+    def wait(self):
+        if self.infinite:
+            self.stop()
+        elif self.searching():
+            self.search_thread.join()
+
+    def info(self, stats):
+        if stats.value is None:
+            score = "none"
+        elif math.isinf(stats.value):
+            score = "win" if stats.value > 0 else "loss"
+        else:
+            score = int(stats.value)
+        line = (f"info depth {stats.depth} seldepth {stats.max_depth} score {score} "
+                f"nodes {stats.nodes} nps {stats.nps:.0f} time {stats.elapsed * 1000:.0f}")
+        if stats.pv:
+            line += " pv " + " ".join(map(str, stats.pv))
+        self.send(line)
+
+
+def parse_options(args):
+    options = {}
+    for arg in args:
+        key, sep, value = arg.partition("=")
+        if not sep:
+            raise ValueError(f"expected key=value, got {arg}")
+        options[key] = value
+    return options
+
+
+# ---------- client ----------
+class EngineProcess:
+    """Drive an engine.py subprocess from Python."""
+
+    def __init__(self, command=None):
+        self.proc = subprocess.Popen(
+            command or [sys.executable, __file__],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, bufsize=1)
+        self.send("isready")
+        self.wait_for("readyok")
+
+    def send(self, line):
+        self.proc.stdin.write(line + "\n")
+        self.proc.stdin.flush()
+
+    def wait_for(self, prefix, on_info=None):
+        """Read up to the line starting with 'prefix' and return it.
+
+        A failed 'go' answers with an error instead of bestmove, so that
+        error is raised at once; any other error comes before the readyok
+        that sync() asked for, which is read first so the next command
+        gets its own reply.
+        """
+        error = None
+        while True:
+            line = self.proc.stdout.readline()
+            if not line:
+                raise EOFError("engine process exited")
+            line = line.strip()
+            if line.startswith("error"):
+                if prefix != "readyok":
+                    raise ValueError(line[6:])
+                error = error or line[6:]
+                continue
+            if line.startswith(prefix):
+                if error is not None:
+                    raise ValueError(error)
+                return line
+            if on_info is not None and line.startswith("info"):
+                on_info(line)
+
+    def new_game(self, n=4, depth=5, rows=ROWS, cols=COLS):
+        self.send(f"newgame n={n} depth={depth} rows={rows} cols={cols}")
+        self.sync()
+
+    def position(self, moves):
+        self.send(" ".join(["position", "moves", *map(str, moves)]))
+        self.sync()
+
+    def sync(self):
+        # errors from the previous command arrive before readyok
+        self.send("isready")
+        self.wait_for("readyok")
+
+    def go(self, time_limit=None, node_limit=None, depth=None, on_info=None):
+        """Search the current position; return the best column."""
+        args = ["go"]
+        if time_limit is not None:
+            args += ["movetime", str(int(time_limit * 1000))]
+        if node_limit is not None:
+            args += ["nodes", str(node_limit)]
+        if depth is not None:
+            args += ["depth", str(depth)]
+        self.send(" ".join(args))
+        move = self.wait_for("bestmove", on_info).split()[1]
+        return None if move == "None" else int(move)
+
+    def close(self):
+        if self.proc.poll() is None:
+            self.send("quit")
+            self.proc.wait()
+
+
+if __name__ == "__main__":
+    EngineServer().run()
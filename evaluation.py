@@ -0,0 +1,100 @@
+class IncrementalEvaluator:
+    """Running heuristic score kept in step with one board.
+
+    Every window carries a code ``x_count * (n + 1) + o_count``; a drop or
+    undo only touches the windows through that cell and adjusts both
+    players' totals from a precomputed code -> score table, so reading
+    the score at a leaf is O(1).
+    """
+
+    def __init__(self, rows, cols, n, windows, cell_windows, score_counts,
+                 player_x=1, player_o=-1, center_bonus=3):
+        self.rows = rows
+        self.cols = cols
+        self.n = n
+        self.windows = windows
+        self.cell_windows = cell_windows
+        self.player_x = player_x
+        self.player_o = player_o
+        self.center_col = cols // 2
+        self.center_bonus = center_bonus
+        self.step = {player_x: n + 1, player_o: 1}
+
+        # score of a window code from each player's point of view
+        size = (n + 1) * (n + 1)
+        score_x = [0] * size
+        score_o = [0] * size
+        for x in range(n + 1):
+            for o in range(n + 1 - x):
+                code = x * (n + 1) + o
+                empty = n - x - o
+                score_x[code] = score_counts(x, o, empty)
+                score_o[code] = score_counts(o, x, empty)
+        self.empty_x = score_x[0]
+        self.empty_o = score_o[0]
+
+        # change in both scores when a piece is added to a window with a
+        # given code; removing it is the negated change at the new code
+        self.deltas = {}
+        for player, step in self.step.items():
+            dx = [0] * size
+            do = [0] * size
+            for code in range(size - step):
+                dx[code] = score_x[code + step] - score_x[code]
+                do[code] = score_o[code + step] - score_o[code]
+            self.deltas[player] = (dx, do)
+
+        self.board = None
+        self.codes = []
+        self.score_x = self.score_o = 0
+
+    def attach(self, board):
+        """Track 'board', rebuilding window codes and scores from scratch."""
+        self.board = board
+        self.codes = [0] * len(self.windows)
+        self.score_x = self.empty_x * len(self.windows)
+        self.score_o = self.empty_o * len(self.windows)
+        for r in range(self.rows):
+            row = board[r]
+            for c in range(self.cols):
+                if row[c] in self.step:
+                    self.add(r, c, row[c])
+
+    def add(self, r, c, player):
+        codes = self.codes
+        step = self.step[player]
+        tx, to = self.deltas[player]
+        dx = do = 0
+        for i in self.cell_windows[r][c]:
+            old = codes[i]
+            codes[i] = old + step
+            dx += tx[old]
+            do += to[old]
+        if c == self.center_col:
+            if player == self.player_x:
+                dx += self.center_bonus
+            else:
+                do += self.center_bonus
+        self.score_x += dx
+        self.score_o += do
+
+    def remove(self, r, c, player):
+        codes = self.codes
+        step = self.step[player]
+        tx, to = self.deltas[player]
+        dx = do = 0
+        for i in self.cell_windows[r][c]:
+            new = codes[i] - step
+            codes[i] = new
+            dx -= tx[new]
+            do -= to[new]
+        if c == self.center_col:
+            if player == self.player_x:
+                dx -= self.center_bonus
+            else:
+                do -= self.center_bonus
+        self.score_x += dx
+        self.score_o += do
+
+    def score(self, player):
+        return self.score_x if player == self.player_x else self.score_o
@@ -1,9 +1,16 @@
+import math
+import os
+import queue
 import threading
 import tkinter as tk
 from tkinter import ttk, messagebox
-from logic import ConnectN, PLAYER_X, PLAYER_O, EMPTY
+from logic import ConnectN, PLAYER_X, PLAYER_O, EMPTY, ROWS, COLS
+from book import OpeningBook
 
 CELL_SIZE = 85
+MAX_BOARD_WIDTH = CELL_SIZE * COLS  # larger boards shrink their cells to fit
+MAX_BOARD_HEIGHT = CELL_SIZE * ROWS
+BOARD_SIZES = ["6x7", "7x8", "8x9", "9x10", "10x10"]
 BOARD_COLOR = "#1565C0"
 EMPTY_COLOR = "#FFFFFF"
 BOT_COLOR = "#E53935"    
@@ -136,7 +143,7 @@ class ConnectNGUI(tk.Tk):
         tk.Label(n_frame, text="Connect N:", font=("Arial", 11, "bold"), 
                 bg="#F5F5F5", fg="#333").pack(side="top", anchor="w", pady=(0, 5))
         self.n_var = tk.StringVar(value="4")
-        n_dropdown = CustomDropdown(n_frame, self.n_var, [3, 4, 5, 6], width=120)
+        n_dropdown = CustomDropdown(n_frame, self.n_var, [3, 4, 5, 6, 7, 8, 9, 10], width=120)
         n_dropdown.pack(side="top", anchor="w")
 
         # AI Depth setting
@@ -157,6 +164,24 @@ class ConnectNGUI(tk.Tk):
         first_dropdown = CustomDropdown(first_frame, self.first_var, ["human", "AI"], width=120)
         first_dropdown.pack(side="top", anchor="w")
 
+        # Board size setting
+        size_frame = tk.Frame(settings_frame, bg="#F5F5F5")
+        size_frame.grid(row=0, column=3, padx=15, pady=8, sticky="w")
+        tk.Label(size_frame, text="Board Size:", font=("Arial", 11, "bold"),
+                bg="#F5F5F5", fg="#333").pack(side="top", anchor="w", pady=(0, 5))
+        self.size_var = tk.StringVar(value=f"{ROWS}x{COLS}")
+        size_dropdown = CustomDropdown(size_frame, self.size_var, BOARD_SIZES, width=120)
+        size_dropdown.pack(side="top", anchor="w")
+
+        # Pondering setting
+        ponder_frame = tk.Frame(settings_frame, bg="#F5F5F5")
+        ponder_frame.grid(row=0, column=4, padx=15, pady=8, sticky="w")
+        tk.Label(ponder_frame, text="Pondering:", font=("Arial", 11, "bold"),
+                bg="#F5F5F5", fg="#333").pack(side="top", anchor="w", pady=(0, 5))
+        self.ponder_var = tk.StringVar(value="on")
+        ponder_dropdown = CustomDropdown(ponder_frame, self.ponder_var, ["on", "off"], width=120)
+        ponder_dropdown.pack(side="top", anchor="w")
+
         # Control buttons frame
         controls_frame = tk.Frame(options_container, bg="#F5F5F5")
         controls_frame.pack(fill="x")
@@ -193,14 +218,15 @@ class ConnectNGUI(tk.Tk):
         
         # Canvas for board
         self.canvas = tk.Canvas(shadow_frame, 
-                               width=CELL_SIZE * 7, 
-                               height=CELL_SIZE * 6, 
+                               width=CELL_SIZE * COLS, 
+                               height=CELL_SIZE * ROWS, 
                                bg=BOARD_COLOR, 
                                highlightthickness=3,
                                highlightbackground=BOARD_SHADOW)
         self.canvas.pack()
         self.canvas.bind("<Button-1>", self.on_click)
         self.canvas.bind("<Motion>", self.on_hover)
+        self.canvas.bind("<Leave>", self.on_leave)
 
         # --- Status bar ---
         status_frame = tk.Frame(self, bg="#E3F2FD", relief="flat", height=50)
@@ -230,47 +256,105 @@ class ConnectNGUI(tk.Tk):
                 bg="#FFEBEE", fg="#C62828", pady=10).pack()
 
         self.game = None
+        self.book = None  # opening book, kept open across games with the same settings
         self.current_player = None
         self.human_player = None
         self.bot_player = None
         self.running_ai = False
         self.hover_col = None
+        self.ponder_thread = None
+        self.ponder_stop = threading.Event()
+        # the search thread reports through this queue; only the Tk thread
+        # touches widgets or applies the AI's move
+        self.search_queue = queue.Queue()
+        self.search_thread = None
+        self.search_stop = threading.Event()
+        self.pending_ai = None
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.after(100, self.poll_search_queue)
+        self.rows = ROWS
+        self.cols = COLS
+        self.cell_size = CELL_SIZE
+        self.piece_items = None  # [row][col] -> (shadow, piece, highlight) canvas ids
+        self.shown = None  # [row][col] -> value the canvas currently shows
+        self.hover_item = None
 
     # ---------- Game setup ----------
     def start_game(self):
         n = int(self.n_var.get())
         depth = int(self.depth_var.get())
         human_first = (self.first_var.get() == "human")
+        rows, cols = (int(x) for x in self.size_var.get().split("x"))
+        if n > max(rows, cols):
+            messagebox.showerror("Invalid settings",
+                                 f"Connect {n} does not fit on a {rows}x{cols} board.")
+            return
 
         bot_player = PLAYER_O if human_first else PLAYER_X
         self.human_player = -bot_player
         self.bot_player = bot_player
 
-        self.game = ConnectN(n=n, search_depth=depth, bot_player=self.bot_player)
+        self.cancel_search()
+        self.stop_pondering()
+        if self.game:
+            self.game.close()
+        self.game = ConnectN(n=n, search_depth=depth, bot_player=self.bot_player,
+                             workers=os.cpu_count() or 1, rows=rows, cols=cols,
+                             book=self.opening_book(n, rows, cols))
         self.current_player = PLAYER_X
+        self.hover_col = None
+        self.resize_board()
 
         player_name = "You start" if human_first else "AI starts"
         self.status.set(f"🎮 Game started! {player_name} first!")
         self.draw_board()
 
         if not human_first:
-            self.after(500, self.ai_move)
+            self.pending_ai = self.after(500, self.ai_move)
+        else:
+            self.start_pondering()
+
+    def opening_book(self, n, rows, cols):
+        """The book for these settings, reusing the open one while they stay the same."""
+        book = self.book
+        if book is not None and (book.n, book.rows, book.cols) != (n, rows, cols):
+            self.book.close()
+            self.book = None
+        if self.book is None:
+            self.book = OpeningBook.open_default(n, rows=rows, cols=cols)
+        return self.book
 
     def reset_game(self):
+        self.cancel_search()
+        self.stop_pondering()
+        if self.game:
+            self.game.close()
         self.game = None
         self.hover_col = None
+        self.piece_items = None
         self.canvas.delete("all")
         self.status.set("Game reset. Click 'START GAME' to begin playing!")
 
     # ---------- Drawing ----------
-    def draw_board(self):
+    def resize_board(self):
+        """Size the canvas from the engine's geometry."""
+        self.rows, self.cols = self.game.rows, self.game.cols
+        self.cell_size = min(CELL_SIZE, MAX_BOARD_WIDTH // self.cols,
+                             MAX_BOARD_HEIGHT // self.rows)
+        self.canvas.configure(width=self.cell_size * self.cols,
+                              height=self.cell_size * self.rows)
+        self.build_board()
+
+    def build_board(self):
+        """Create every canvas item once; later moves only reconfigure them."""
         self.canvas.delete("all")
-
-        # Draw background grid
-        for r in range(6):
-            for c in range(7):
-                x1, y1 = c * CELL_SIZE, r * CELL_SIZE
-                x2, y2 = x1 + CELL_SIZE, y1 + CELL_SIZE
+        size = self.cell_size
+        self.piece_items = []
+        for r in range(self.rows):
+            row_items = []
+            for c in range(self.cols):
+                x1, y1 = c * size, r * size
+                x2, y2 = x1 + size, y1 + size
                 
                 # Draw cell background
                 self.canvas.create_rectangle(x1, y1, x2, y2, 
@@ -286,75 +370,93 @@ class ConnectNGUI(tk.Tk):
                                        outline="#90CAF9",
                                        width=3)
 
-        # Draw pieces
+                # Piece with shadow and highlight, hidden until played
+                shadow_offset = 3
+                shadow = self.canvas.create_oval(x1 + PIECE_PADDING + shadow_offset, 
+                                                y1 + PIECE_PADDING + shadow_offset, 
+                                                x2 - PIECE_PADDING + shadow_offset, 
+                                                y2 - PIECE_PADDING + shadow_offset, 
+                                                fill="#424242", outline="", state="hidden")
+                piece = self.canvas.create_oval(x1 + PIECE_PADDING, y1 + PIECE_PADDING, 
+                                               x2 - PIECE_PADDING, y2 - PIECE_PADDING, 
+                                               fill=EMPTY_COLOR, outline="#212121", width=3,
+                                               state="hidden")
+                highlight_size = 8
+                highlight = self.canvas.create_oval(x1 + PIECE_PADDING + highlight_size, 
+                                                   y1 + PIECE_PADDING + highlight_size,
+                                                   x1 + PIECE_PADDING + highlight_size * 3,
+                                                   y1 + PIECE_PADDING + highlight_size * 3,
+                                                   fill="white", outline="", state="hidden")
+                row_items.append((shadow, piece, highlight))
+            self.piece_items.append(row_items)
+        self.shown = [[EMPTY] * self.cols for _ in range(self.rows)]
+
+        # One hover overlay, moved between columns
+        self.hover_item = self.canvas.create_rectangle(0, 0, size, size * self.rows,
+                                                       fill="white", stipple="gray50",
+                                                       outline="", state="hidden")
+        self.hover_col = None
+
+    def draw_board(self):
+        """Bring the canvas up to date with the game, touching only changed cells."""
+        if self.piece_items is None:
+            self.build_board()
         if not self.game:
             return
-
-        for r in range(6):
-            for c in range(7):
-                val = self.game.board[r][c]
-                if val == EMPTY:
+        board = self.game.board
+        colors = {
+            PLAYER_X: BOT_COLOR if self.bot_player == PLAYER_X else HUMAN_COLOR,
+            PLAYER_O: BOT_COLOR if self.bot_player == PLAYER_O else HUMAN_COLOR,
+        }
+        for r in range(self.rows):
+            row, shown = board[r], self.shown[r]
+            for c in range(self.cols):
+                val = row[c]
+                if val == shown[c]:
                     continue
-                    
-                if val == PLAYER_X:
-                    color = BOT_COLOR if self.bot_player == PLAYER_X else HUMAN_COLOR
-                elif val == PLAYER_O:
-                    color = BOT_COLOR if self.bot_player == PLAYER_O else HUMAN_COLOR
-                
-                x1, y1 = c * CELL_SIZE, r * CELL_SIZE
-                x2, y2 = x1 + CELL_SIZE, y1 + CELL_SIZE
-                
-                # Draw piece with shadow
-                shadow_offset = 3
-                self.canvas.create_oval(x1 + PIECE_PADDING + shadow_offset, 
-                                       y1 + PIECE_PADDING + shadow_offset, 
-                                       x2 - PIECE_PADDING + shadow_offset, 
-                                       y2 - PIECE_PADDING + shadow_offset, 
-                                       fill="#424242", outline="")
-                
-                # Draw main piece
-                self.canvas.create_oval(x1 + PIECE_PADDING, y1 + PIECE_PADDING, 
-                                       x2 - PIECE_PADDING, y2 - PIECE_PADDING, 
-                                       fill=color, outline="#212121", width=3)
-                
-                # Add highlight for 3D effect
-                highlight_size = 8
-                self.canvas.create_oval(x1 + PIECE_PADDING + highlight_size, 
-                                       y1 + PIECE_PADDING + highlight_size,
-                                       x1 + PIECE_PADDING + highlight_size * 3,
-                                       y1 + PIECE_PADDING + highlight_size * 3,
-                                       fill="white", outline="")
+                shown[c] = val
+                shadow, piece, highlight = self.piece_items[r][c]
+                if val == EMPTY:
+                    for item in (shadow, piece, highlight):
+                        self.canvas.itemconfig(item, state="hidden")
+                else:
+                    self.canvas.itemconfig(piece, fill=colors[val])
+                    for item in (shadow, piece, highlight):
+                        self.canvas.itemconfig(item, state="normal")
 
     # ---------- Hover effect ----------
     def on_hover(self, event):
         if not self.game or self.running_ai:
             return
         
-        col = event.x // CELL_SIZE
-        if col < 0 or col >= 7:
+        col = event.x // self.cell_size
+        if col < 0 or col >= self.cols:
             return
         
         if self.hover_col != col:
             self.hover_col = col
-            self.draw_board()
-            
-            # Draw hover indicator
-            x1 = col * CELL_SIZE
-            x2 = x1 + CELL_SIZE
-            self.canvas.create_rectangle(x1, 0, x2, CELL_SIZE * 6,
-                                        fill="white", stipple="gray50",
-                                        outline="")
+            x1 = col * self.cell_size
+            self.canvas.coords(self.hover_item, x1, 0, x1 + self.cell_size,
+                               self.cell_size * self.rows)
+            self.canvas.itemconfig(self.hover_item, state="normal")
+
+    def on_leave(self, event):
+        if self.piece_items is not None:
+            self.canvas.itemconfig(self.hover_item, state="hidden")
+        self.hover_col = None
 
     # ---------- Input ----------
     def on_click(self, event):
         if not self.game or self.running_ai:
             return
-        col = event.x // CELL_SIZE
-        if col < 0 or col >= 7:
+        col = event.x // self.cell_size
+        if col < 0 or col >= self.cols:
             return
 
+        self.stop_pondering()
         if not self.game.play(col, self.human_player):
             self.status.set("❌ Column full! Choose another column.")
+            self.start_pondering()
             return
 
         self.draw_board()
@@ -363,22 +465,73 @@ class ConnectNGUI(tk.Tk):
 
         self.current_player *= -1
         self.status.set("🤔 AI is thinking...")
-        self.after(300, self.ai_move)
+        self.pending_ai = self.after(300, self.ai_move)
 
     # ---------- AI Turn ----------
     def ai_move(self):
+        self.pending_ai = None
         if not self.game or self.running_ai:
             return
 
+        game, stop, results = self.game, threading.Event(), self.search_queue
+        # a reply pondered to at least the search depth on the human's time
+        # is already in the TT, so a serial deepening to that depth is cheap;
+        # a shallower ponder is no head start on the parallel fixed-depth search
+        last = game.moves[-1] if game.moves else None
+        pondered = game.ponder_depths.get(last, 0)
+        game.ponder_depths = {}
+
+        def progress(stats):
+            results.put(("progress", game, stop, stats))
+
         def think():
-            self.running_ai = True
-            move = self.game.find_best_move()
-            if move is not None:
-                self.game.play(move, self.bot_player)
-            self.running_ai = False
-            self.after(0, self.finish_ai_move)
+            if pondered >= game.depth:
+                move = game.find_best_move(time_limit=math.inf, max_depth=pondered,
+                                           callback=progress, stop_event=stop)
+            else:
+                move = game.find_best_move(callback=progress, stop_event=stop)
+            results.put(("done", game, stop, move))
+
+        self.running_ai = True
+        self.search_stop = stop
+        self.search_thread = threading.Thread(target=think, daemon=True)
+        self.search_thread.start()
+
+    def cancel_search(self):
+        """Stop a running or scheduled AI search and wait for its thread."""
+        if self.pending_ai is not None:
+            self.after_cancel(self.pending_ai)
+            self.pending_ai = None
+        self.search_stop.set()
+        if self.search_thread is not None:
+            self.search_thread.join()
+            self.search_thread = None
+        self.running_ai = False
 
-        threading.Thread(target=think, daemon=True).start()
+    def poll_search_queue(self):
+        # messages from cancelled searches or replaced games are dropped
+        try:
+            while True:
+                kind, game, stop, payload = self.search_queue.get_nowait()
+                if game is not self.game or stop.is_set():
+                    continue
+                if kind == "progress":
+                    self.show_progress(payload)
+                else:
+                    self.search_thread = None
+                    self.running_ai = False
+                    if payload is not None:
+                        game.play(payload, self.bot_player)
+                    self.finish_ai_move()
+        except queue.Empty:
+            pass
+        self.after(100, self.poll_search_queue)
+
+    def show_progress(self, stats):
+        text = f"🤔 AI is thinking... {stats.nodes:,} positions, {stats.nps:,.0f}/s"
+        if stats.depth:
+            text += f", depth {stats.depth} best column {stats.best_move}"
+        self.status.set(text)
 
     def finish_ai_move(self):
         self.draw_board()
@@ -386,19 +539,42 @@ class ConnectNGUI(tk.Tk):
             return
         self.current_player *= -1
         self.status.set("🎯 Your turn! Click a column to play.")
+        self.start_pondering()
+
+    # ---------- Pondering ----------
+    def start_pondering(self):
+        """Search the human's possible replies in the background."""
+        if self.ponder_var.get() != "on" or not self.game or self.game.game_over():
+            return
+        self.ponder_stop.clear()
+        self.ponder_thread = threading.Thread(target=self.game.ponder,
+                                              args=(self.ponder_stop,), daemon=True)
+        self.ponder_thread.start()
+
+    def stop_pondering(self):
+        if self.ponder_thread is not None:
+            self.ponder_stop.set()
+            self.ponder_thread.join()
+            self.ponder_thread = None
+
+    def on_close(self):
+        self.cancel_search()
+        self.stop_pondering()
+        if self.game:
+            self.game.close()
+        if self.book is not None:
+            self.book.close()
+        self.destroy()
 
     # ---------- End game ----------
     def check_game_end(self):
-        if self.game.check_win(self.game.board, PLAYER_X):
-            winner = PLAYER_X
-        elif self.game.check_win(self.game.board, PLAYER_O):
-            winner = PLAYER_O
-        elif self.game.is_draw(self.game.board):
+        winner = self.game.winner()
+        if winner is None:
+            if not self.game.is_draw(self.game.board):
+                return False
             self.status.set("🤝 It's a draw!")
             messagebox.showinfo("Draw", "The game ended in a draw!")
             return True
-        else:
-            return False
 
         if winner == self.human_player:
             msg = "🎉 Congratulations! You win!"
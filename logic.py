@@ -2,51 +2,424 @@
 
 import math
 import random
+import time
 from copy import deepcopy
+from functools import lru_cache
+
+from evaluation import IncrementalEvaluator
+from ordering import MoveOrderer
+from stats import SearchStats
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
 
 ROWS = 6
 COLS = 7
 PLAYER_X = 1  # bot
 PLAYER_O = -1  # opponent / human
 EMPTY = 0
+ASPIRATION_WINDOW = 50  # half-width of the iterative-deepening search window
+# empty cells below which positions are solved exactly, by N: larger N
+# leaves fewer early wins to cut the proof short
+ENDGAME_THRESHOLDS = {3: 20, 4: 20, 5: 16}
+ENDGAME_THRESHOLD = 14  # for N not listed above
+SOLVER_SHARE = 0.5  # share of a time or node budget the endgame solver may use
+SOLVER_NODES = 10000  # solver node cap when the search has no budget
+THREAT_NODES = 5000  # node budget of the threat-space pre-pass
+SEARCH_CORES = ("alphabeta", "pvs")
+LMR_MOVES = 3  # with search_core="pvs", moves searched before reductions start
+LMR_MIN_DEPTH = 3  # remaining depth below which no move is reduced
+
+
+class SearchAborted(Exception):
+    """Raised inside minimax when the time or node budget runs out."""
+
+
+# ---------- window tables ----------
+@lru_cache(maxsize=None)
+def window_cells(rows, cols, n):
+    """Every length-n window as a tuple of (row, col) cells, row 0 at the top."""
+    windows = []
+    for r in range(rows):
+        for c in range(cols):
+            # horizontal, vertical, diagonal down-right, diagonal up-right
+            for dr, dc in ((0, 1), (1, 0), (1, 1), (-1, 1)):
+                end_r, end_c = r + dr * (n - 1), c + dc * (n - 1)
+                if 0 <= end_r < rows and 0 <= end_c < cols:
+                    windows.append(tuple((r + dr * i, c + dc * i) for i in range(n)))
+    return tuple(windows)
+
+
+@lru_cache(maxsize=None)
+def cell_windows(rows, cols, n):
+    """For every cell, the indices of the windows passing through it."""
+    index = [[[] for _ in range(cols)] for _ in range(rows)]
+    for i, cells in enumerate(window_cells(rows, cols, n)):
+        for r, c in cells:
+            index[r][c].append(i)
+    return tuple(tuple(tuple(ix) for ix in row) for row in index)
+
+
+def cell_bit(rows, r, c):
+    """Bit index of list cell (r, c) on a bitboard with ``rows`` rows."""
+    return c * (rows + 1) + rows - 1 - r
+
+
+@lru_cache(maxsize=None)
+def window_masks(rows, cols, n):
+    """Bitmask of every length-n window on a bitboard of the given size."""
+    return tuple(
+        sum(1 << cell_bit(rows, r, c) for r, c in cells)
+        for cells in window_cells(rows, cols, n)
+    )
+
+
+@lru_cache(maxsize=None)
+def cell_window_masks(rows, cols, n):
+    """For every cell, the bitmasks of the windows passing through it."""
+    masks = window_masks(rows, cols, n)
+    return tuple(
+        tuple(tuple(masks[i] for i in ix) for ix in row)
+        for row in cell_windows(rows, cols, n)
+    )
+
+
+@lru_cache(maxsize=None)
+def zobrist_keys(rows, cols):
+    """64-bit Zobrist key per (player, bit), fixed-seeded so hashes are stable."""
+    rng = random.Random(0x5EED ^ (rows << 8) ^ cols)
+    bits = cols * (rows + 1)
+    return {
+        PLAYER_X: tuple(rng.getrandbits(64) for _ in range(bits)),
+        PLAYER_O: tuple(rng.getrandbits(64) for _ in range(bits)),
+    }
+
+
+# xor-ed into the position hash when the minimizing side is to move
+SIDE_KEY = random.Random(0x51DE).getrandbits(64)
+
+
+# ---------- bitboard ----------
+class Bitboard:
+    """Connect-N position stored as two integer masks plus column heights.
+
+    Bit ``col * (rows + 1) + height`` is the cell ``height`` places above
+    the bottom of ``col``; the extra bit on top of every column is always
+    zero so shifted masks never wrap into the next column.
+    Indexing (``board[r][c]``) gives the same top-down view as the plain
+    list-of-lists board.
+    """
+
+    __slots__ = ("rows", "cols", "n", "masks", "heights", "key", "mirror_key", "zobrist")
+
+    def __init__(self, rows=ROWS, cols=COLS, n=4):
+        self.rows = rows
+        self.cols = cols
+        self.n = n
+        self.masks = {PLAYER_X: 0, PLAYER_O: 0}
+        self.heights = [0] * cols
+        self.key = 0  # Zobrist hash, updated on every drop/undo
+        self.mirror_key = 0  # hash of the left-right mirrored position
+        self.zobrist = zobrist_keys(rows, cols)
+
+    @classmethod
+    def from_list(cls, board, n=4):
+        """Build a bitboard from a list-of-lists board."""
+        rows, cols = len(board), len(board[0])
+        bb = cls(rows, cols, n)
+        for c in range(cols):
+            for r in range(rows - 1, -1, -1):
+                if board[r][c] == EMPTY:
+                    break
+                bb.drop(c, board[r][c])
+        return bb
+
+    def copy(self):
+        bb = Bitboard.__new__(Bitboard)
+        bb.rows, bb.cols, bb.n = self.rows, self.cols, self.n
+        bb.masks = dict(self.masks)
+        bb.heights = self.heights[:]
+        bb.key = self.key
+        bb.mirror_key = self.mirror_key
+        bb.zobrist = self.zobrist
+        return bb
+
+    def to_list(self):
+        return [self[r] for r in range(self.rows)]
+
+    def __getitem__(self, r):
+        """Row ``r`` (0 = top) as a list of cell values."""
+        h = self.rows + 1
+        bit = self.rows - 1 - r
+        x, o = self.masks[PLAYER_X], self.masks[PLAYER_O]
+        row = []
+        for c in range(self.cols):
+            b = 1 << (c * h + bit)
+            row.append(PLAYER_X if x & b else PLAYER_O if o & b else EMPTY)
+        return row
+
+    def valid_moves(self):
+        rows = self.rows
+        return [c for c, height in enumerate(self.heights) if height < rows]
+
+    def drop(self, col, player):
+        """Place a piece for ``player`` in ``col``; O(1)."""
+        height = self.heights[col]
+        if height >= self.rows:
+            return False
+        h = self.rows + 1
+        bit = col * h + height
+        self.masks[player] |= 1 << bit
+        keys = self.zobrist[player]
+        self.key ^= keys[bit]
+        self.mirror_key ^= keys[(self.cols - 1 - col) * h + height]
+        self.heights[col] = height + 1
+        return True
+
+    def undo(self, col):
+        """Remove the top piece from ``col``; O(1)."""
+        height = self.heights[col] - 1
+        if height < 0:
+            return
+        h = self.rows + 1
+        bit = col * h + height
+        player = PLAYER_X if self.masks[PLAYER_X] >> bit & 1 else PLAYER_O
+        self.masks[player] &= ~(1 << bit)
+        keys = self.zobrist[player]
+        self.key ^= keys[bit]
+        self.mirror_key ^= keys[(self.cols - 1 - col) * h + height]
+        self.heights[col] = height
+
+    def has_won(self, player):
+        """Shift-and-AND test for n in a row in any direction."""
+        bits = self.masks[player]
+        n = self.n
+        h = self.rows + 1
+        for shift in (1, h, h + 1, h - 1):
+            m = bits
+            for i in range(1, n):
+                m &= bits >> (shift * i)
+                if not m:
+                    break
+            if m:
+                return True
+        return False
+
+    def is_full(self):
+        rows = self.rows
+        return all(height == rows for height in self.heights)
+
+    def canonical_key(self):
+        """(key, mirrored): the lesser of the key and the mirrored key, and
+        whether it is the mirrored one. Mirrored positions share cache
+        entries; moves stored under a mirrored key are mirrored too."""
+        if self.mirror_key < self.key:
+            return self.mirror_key, True
+        return self.key, False
+
+    def is_symmetric(self):
+        return self.key == self.mirror_key
 
 
 class ConnectN:
-    def __init__(self, n=4, search_depth=5, bot_player=PLAYER_X):
-        assert 3 <= n <= 6
+    def __init__(self, n=4, search_depth=5, bot_player=PLAYER_X, bitboard=True,
+                 tt_size=1 << 18, move_ordering=True, seed=None, incremental_eval=True,
+                 workers=1, smp="root", book=None, rows=ROWS, cols=COLS,
+                 endgame_threshold=None, threat_nodes=THREAT_NODES,
+                 search_core="alphabeta"):
+        assert rows >= 1 and cols >= 1
+        assert 3 <= n <= max(rows, cols)
         self.n = n
-        self.rows = ROWS
-        self.cols = COLS
+        self.rows = rows
+        self.cols = cols
         self.depth = search_depth
         self.bot = bot_player
-        self.board = [[EMPTY for _ in range(COLS)] for _ in range(ROWS)]
+        self.use_bitboard = bitboard
+        self.windows = window_cells(self.rows, self.cols, n)
+        self.cell_windows = cell_windows(self.rows, self.cols, n)
+        self.cell_masks = cell_window_masks(self.rows, self.cols, n)
+        self.board = self.new_board()
+        self.moves = []
+        # Heuristic score maintained on every drop/undo of the game board
+        self.evaluator = None
+        if incremental_eval:
+            self.evaluator = IncrementalEvaluator(
+                self.rows, self.cols, n, self.windows, self.cell_windows,
+                self.score_counts, PLAYER_X, PLAYER_O)
+            self.evaluator.attach(self.board)
+        # Search results shared across moves of one game; needs the bitboard
+        # for its incremental Zobrist key. tt_size=0 disables it.
+        self.tt = TranspositionTable(tt_size) if bitboard and tt_size else None
+        # True for the default MoveOrderer, an orderer object, or False for
+        # plain column order
+        if move_ordering is True:
+            move_ordering = MoveOrderer(self.rows, self.cols)
+        self.ordering = move_ordering or None
+        self.rng = random.Random(seed)  # root tie-breaking only
+        # "alphabeta" searches every move with the full window to full depth;
+        # "pvs" adds null-window scouting, late-move reductions and an
+        # extension for moves that threaten to win
+        assert search_core in SEARCH_CORES
+        self.search_core = search_core
+        self.pvs = search_core == "pvs"
+        # search budget, set by find_best_move
+        self.nodes = 0
+        self.node_limit = None
+        self.deadline = None
+        self.stop_event = None  # any object with is_set(), checked like the deadline
+        self.completed_depth = 0
+        self.ponder_depths = {}  # reply -> depth pondered for the bot after it
+        # instrumentation, collected into self.stats by find_best_move
+        self.stats = SearchStats()
+        self.callback = None
+        self.progress_interval = 0.25  # seconds between callback snapshots
+        self.reset_counters()
+        # workers > 1 searches on a process pool: smp="root" splits the root
+        # moves of fixed-depth searches, smp="lazy" runs Lazy SMP workers
+        # sharing one transposition table
+        assert smp in ("root", "lazy")
+        self.workers = workers
+        self.smp = smp
+        self.parallel = None
+        self.best_value = None
+        # opening book (book.OpeningBook or anything with lookup(key)),
+        # consulted before searching when the bot is to move
+        if book is not None and hasattr(book, "matches") and not book.matches(self):
+            raise ValueError(f"opening book is for N={book.n} on {book.rows}x{book.cols}, "
+                             f"not N={n} on {rows}x{cols}")
+        self.book = book
+        # below this many empty cells positions are solved exactly instead
+        # of searched heuristically; None picks it by N, 0 disables it
+        if endgame_threshold is None:
+            endgame_threshold = ENDGAME_THRESHOLDS.get(n, ENDGAME_THRESHOLD)
+        self.solver = None
+        if bitboard and endgame_threshold:
+            from solver import EndgameSolver
+            self.solver = EndgameSolver(self, endgame_threshold)
+        self.solved_score = None
+        # forced wins by threat sequences are looked for before the full
+        # search, within 'threat_nodes' nodes of their own; 0 disables it
+        self.threats = None
+        if bitboard and threat_nodes:
+            from threats import ThreatSearch
+            self.threats = ThreatSearch(self, threat_nodes)
+
+    def reset(self):
+        """Start a new game, clearing the board and transposition table."""
+        self.board = self.new_board()
+        self.moves = []
+        if self.evaluator is not None:
+            self.evaluator.attach(self.board)
+        if self.tt is not None:
+            self.tt.clear()
+        if self.ordering is not None:
+            self.ordering.clear()
 
     # ---------- board helpers ----------
+    def new_board(self):
+        if self.use_bitboard:
+            return Bitboard(self.rows, self.cols, self.n)
+        return [[EMPTY for _ in range(self.cols)] for _ in range(self.rows)]
+
     def copy_board(self):
+        if isinstance(self.board, Bitboard):
+            return self.board.copy()
         return deepcopy(self.board)
 
-    def valid_moves(self):
+    def valid_moves(self, board=None):
         """Return all columns where a move can be played."""
-        return [c for c in range(self.cols) if self.board[0][c] == EMPTY]
+        if board is None:
+            board = self.board
+        if isinstance(board, Bitboard):
+            return board.valid_moves()
+        return [c for c in range(self.cols) if board[0][c] == EMPTY]
 
     def drop_piece(self, board, col, player):
         """Place a piece in the chosen column."""
-        for r in range(self.rows - 1, -1, -1):
-            if board[r][col] == EMPTY:
-                board[r][col] = player
-                return True
-        return False
+        if isinstance(board, Bitboard):
+            if not board.drop(col, player):
+                return False
+            row = self.rows - board.heights[col]
+        else:
+            for row in range(self.rows - 1, -1, -1):
+                if board[row][col] == EMPTY:
+                    board[row][col] = player
+                    break
+            else:
+                return False
+        evaluator = self.evaluator
+        if evaluator is not None and evaluator.board is board:
+            evaluator.add(row, col, player)
+        return True
 
     def undo_piece(self, board, col):
         """Remove the top piece from the chosen column."""
+        row = self.top_row(board, col)
+        if row is None:
+            return
+        evaluator = self.evaluator
+        if evaluator is not None and evaluator.board is board:
+            evaluator.remove(row, col, self.piece_at(board, row, col))
+        if isinstance(board, Bitboard):
+            board.undo(col)
+        else:
+            board[row][col] = EMPTY
+
+    def piece_at(self, board, row, col):
+        if isinstance(board, Bitboard):
+            bit = 1 << cell_bit(self.rows, row, col)
+            if board.masks[PLAYER_X] & bit:
+                return PLAYER_X
+            return PLAYER_O if board.masks[PLAYER_O] & bit else EMPTY
+        return board[row][col]
+
+    def sync_evaluator(self):
+        """Re-attach the incremental evaluator if the game board was replaced."""
+        if self.evaluator is not None and self.evaluator.board is not self.board:
+            self.evaluator.attach(self.board)
+
+    def landing_cell(self, board, col):
+        """Bit index of the cell the next piece in 'col' would occupy."""
+        if isinstance(board, Bitboard):
+            return col * (self.rows + 1) + board.heights[col]
+        row = self.top_row(board, col)
+        return cell_bit(self.rows, self.rows - 1 if row is None else row - 1, col)
+
+    def top_row(self, board, col):
+        """Row index of the top piece in 'col', or None if it is empty."""
+        if isinstance(board, Bitboard):
+            height = board.heights[col]
+            return self.rows - height if height else None
         for r in range(self.rows):
             if board[r][col] != EMPTY:
-                board[r][col] = EMPTY
-                return
+                return r
+        return None
 
     # ---------- win / draw checks ----------
+    def check_win_at(self, board, col):
+        """Check if the top piece in 'col' completes a line for its owner.
+
+        Only the windows through that cell are examined, so this is the
+        terminal test used after every drop during search.
+        """
+        row = self.top_row(board, col)
+        if row is None:
+            return False
+        if isinstance(board, Bitboard):
+            bit = 1 << cell_bit(self.rows, row, col)
+            pieces = board.masks[PLAYER_X]
+            if not pieces & bit:
+                pieces = board.masks[PLAYER_O]
+            return any((pieces & m) == m for m in self.cell_masks[row][col])
+        player = board[row][col]
+        windows = self.windows
+        return any(
+            all(board[r][c] == player for r, c in windows[i])
+            for i in self.cell_windows[row][col]
+        )
+
     def check_win(self, board, player):
-        """Check if 'player' has won."""
+        """Check if 'player' has won (full-board scan)."""
+        if isinstance(board, Bitboard):
+            return board.has_won(player)
         n = self.n
         R, C = self.rows, self.cols
 
@@ -72,18 +445,33 @@ class ConnectN:
                     return True
         return False
 
+    def empty_cells(self, board):
+        if isinstance(board, Bitboard):
+            return self.rows * self.cols - sum(board.heights)
+        return sum(row.count(EMPTY) for row in board)
+
+    def side_to_move(self, board):
+        """Player to move, assuming X moved first and turns alternated."""
+        filled = self.rows * self.cols - self.empty_cells(board)
+        return PLAYER_X if filled % 2 == 0 else PLAYER_O
+
     def is_draw(self, board):
+        if isinstance(board, Bitboard):
+            return board.is_full()
         return all(board[0][c] != EMPTY for c in range(self.cols))
 
     # ---------- evaluation ----------
     def evaluate_window(self, window, player):
         """Score a single list of cells (length n)"""
         opp = PLAYER_X if player == PLAYER_O else PLAYER_O
-        score = 0
         count_self = window.count(player)
         count_opp = window.count(opp)
         count_empty = window.count(EMPTY)
+        return self.score_counts(count_self, count_opp, count_empty)
 
+    def score_counts(self, count_self, count_opp, count_empty):
+        """Score a window from its piece counts."""
+        score = 0
         if count_self == self.n:
             score += 100000
         elif count_self == self.n - 1 and count_empty == 1:
@@ -98,106 +486,694 @@ class ConnectN:
 
     def evaluate_board(self, board, player):
         """Heuristic evaluation of current board from 'player' POV."""
+        evaluator = self.evaluator
+        if evaluator is not None and evaluator.board is board:
+            return evaluator.score(player)
+        if isinstance(board, Bitboard):
+            return self.evaluate_bitboard(board, player)
         score = 0
-        R, C = self.rows, self.cols
-        n = self.n
 
         # center preference
-        center_col = C // 2
-        center_array = [board[r][center_col] for r in range(R)]
+        center_col = self.cols // 2
+        center_array = [board[r][center_col] for r in range(self.rows)]
         center_count = center_array.count(player)
         score += center_count * 3
 
-        # horizontal
-        for r in range(R):
-            row_array = board[r]
-            for c in range(C - n + 1):
-                window = row_array[c:c + n]
-                score += self.evaluate_window(window, player)
-
-        # vertical
-        for c in range(C):
-            col_array = [board[r][c] for r in range(R)]
-            for r in range(R - n + 1):
-                window = col_array[r:r + n]
-                score += self.evaluate_window(window, player)
+        # every horizontal, vertical and diagonal window, from the cached table
+        for cells in self.windows:
+            window = [board[r][c] for r, c in cells]
+            score += self.evaluate_window(window, player)
 
-        # diagonal down-right
-        for r in range(R - n + 1):
-            for c in range(C - n + 1):
-                window = [board[r + i][c + i] for i in range(n)]
-                score += self.evaluate_window(window, player)
+        return score
 
-        # diagonal up-right
-        for r in range(n - 1, R):
-            for c in range(C - n + 1):
-                window = [board[r - i][c + i] for i in range(n)]
-                score += self.evaluate_window(window, player)
+    def evaluate_bitboard(self, board, player):
+        """Same heuristic as evaluate_board, using precomputed window masks."""
+        mine = board.masks[player]
+        theirs = board.masks[-player]
+        n = self.n
+        center_col = self.cols // 2
+        center_mask = ((1 << self.rows) - 1) << (center_col * (self.rows + 1))
+        score = (mine & center_mask).bit_count() * 3
 
+        score_counts = self.score_counts
+        for w in window_masks(self.rows, self.cols, n):
+            count_self = (mine & w).bit_count()
+            count_opp = (theirs & w).bit_count()
+            score += score_counts(count_self, count_opp, n - count_self - count_opp)
         return score
 
-    # ---------- minimax with alpha-beta ----------
-    def minimax(self, board, depth, alpha, beta, maximizingPlayer):
-        valid_moves = self.valid_moves()
-        is_terminal = (
-            self.check_win(board, PLAYER_X) or
-            self.check_win(board, PLAYER_O) or
-            self.is_draw(board)
+    # ---------- move ordering ----------
+    def would_win(self, board, col, player):
+        """Check if dropping 'player' in 'col' completes a line, without moving."""
+        if isinstance(board, Bitboard):
+            height = board.heights[col]
+            if height >= self.rows:
+                return False
+            bit = col * (self.rows + 1) + height
+            pieces = board.masks[player] | 1 << bit
+            row = self.rows - 1 - height
+            return any((pieces & m) == m for m in self.cell_masks[row][col])
+        row = self.top_row(board, col)
+        row = self.rows - 1 if row is None else row - 1
+        if row < 0:
+            return False
+        windows = self.windows
+        return any(
+            all(board[r][c] == player or (r, c) == (row, col) for r, c in windows[i])
+            for i in self.cell_windows[row][col]
         )
-        if depth == 0 or is_terminal:
-            if is_terminal:
-                if self.check_win(board, self.bot):
-                    return (None, math.inf)
-                elif self.check_win(board, -self.bot):
-                    return (None, -math.inf)
-                else:
-                    return (None, 0)
-            else:
-                return (None, self.evaluate_board(board, self.bot))
+
+    def winning_moves(self, board, player, moves):
+        """Columns among 'moves' where 'player' wins immediately."""
+        return [col for col in moves if self.would_win(board, col, player)]
+
+    def distinct_moves(self, moves):
+        """'moves' without the mirror images of other moves, for a
+        left-right symmetric position; the left half and center are kept."""
+        return [col for col in moves if 2 * col < self.cols]
+
+    def threat_check(self, board, player, moves):
+        """Tactical precheck for 'player' to move: (wins, threats).
+
+        'wins' are the moves that win at once, 'threats' the columns where
+        the opponent would win on their next move. With no win, one threat
+        forces the block and two or more lose.
+        """
+        wins = self.winning_moves(board, player, moves)
+        if wins:
+            return wins, []
+        return wins, self.winning_moves(board, -player, moves)
+
+    def creates_threat(self, board, col, player):
+        """True if 'player''s piece just dropped in 'col' leaves them a win
+        next move: a line it completes to N-1 with the gap playable, or a
+        win on top of it."""
+        if not isinstance(board, Bitboard):
+            return bool(self.winning_moves(board, player, self.valid_moves(board)))
+        if self.would_win(board, col, player):
+            return True
+        h = self.rows + 1
+        heights = board.heights
+        height = heights[col] - 1
+        pieces = board.masks[player]
+        for m in self.cell_masks[self.rows - 1 - height][col]:
+            missing = m & ~pieces
+            if missing & (missing - 1):
+                continue  # more than one cell short
+            c, r = divmod(missing.bit_length() - 1, h)
+            if heights[c] == r:
+                return True
+        return False
+
+    def forced_move(self):
+        """Bot's move when it needs no search, else None: a winning move,
+        the only block, the only legal move, or any move in a lost position.
+        The value is recorded too: proven when the position is decided (with
+        the exact score in solver range), else the static evaluation after
+        the forced move."""
+        moves = self.valid_moves()
+        wins, threats = self.threat_check(self.board, self.bot, moves)
+        solvable = self.solver is not None and self.solver.applies(self.board)
+        if wins:
+            self.best_value, self.completed_depth = math.inf, 1
+            if solvable:
+                self.solved_score = self.empty_cells(self.board)
+            return wins[0]
+        if len(threats) > 1:
+            self.best_value, self.completed_depth = -math.inf, 2
+            if solvable:
+                self.solved_score = 1 - self.empty_cells(self.board)
+            return threats[0]
+        if threats:
+            col = threats[0]
+        elif len(moves) == 1:
+            col = moves[0]
+        else:
+            return None
+        board = self.board
+        self.drop_piece(board, col, self.bot)
+        replies = self.valid_moves(board)
+        if self.winning_moves(board, -self.bot, replies):
+            # the block lets the opponent win on top of it
+            self.best_value, self.completed_depth = -math.inf, 2
+            if solvable:
+                self.solved_score = -self.empty_cells(board)
+        elif not replies:
+            self.best_value, self.completed_depth = 0, 1
+            if solvable:
+                self.solved_score = 0
+        else:
+            self.best_value, self.completed_depth = self.evaluate_board(board, self.bot), 1
+        self.undo_piece(board, col)
+        return col
+
+    def order_moves(self, board, moves, ply, player, first_move=None, wins=None):
+        if ply == 0:
+            self.rng.shuffle(moves)  # ties between equal moves break randomly
+        if self.ordering is None:
+            if first_move in moves:
+                moves.remove(first_move)
+                moves.insert(0, first_move)
+            return moves
+        cells = [self.landing_cell(board, col) for col in moves]
+        if wins is None:
+            wins = self.winning_moves(board, player, moves)
+        return self.ordering.order(moves, ply, player, cells, first_move, wins)
+
+    def record_cutoff(self, board, col, ply, depth, player):
+        self.cutoffs[ply] = self.cutoffs.get(ply, 0) + 1
+        if self.ordering is not None:
+            cell = self.landing_cell(board, col)
+            self.ordering.record_cutoff(col, cell, ply, depth, player)
+
+    # ---------- minimax with alpha-beta ----------
+    def poll_search(self):
+        """Periodic check from minimax: send progress, return True to abort."""
+        now = time.perf_counter()
+        if self.callback is not None and now >= self.next_progress:
+            self.next_progress = now + self.progress_interval
+            self.callback(self.snapshot())
+        if self.deadline is not None and now >= self.deadline:
+            return True
+        return self.stop_event is not None and self.stop_event.is_set()
+
+    def minimax(self, board, depth, alpha, beta, maximizingPlayer, first_move=None, ply=0):
+        self.nodes += 1
+        if self.node_limit is not None and self.nodes > self.node_limit:
+            raise SearchAborted
+        if not self.nodes & 255 and self.poll_search():
+            raise SearchAborted
+        if ply > self.max_ply:
+            self.max_ply = ply
+
+        # Wins are detected right after the winning piece is dropped, so a
+        # node only has to recognise a full board.
+        valid_moves = self.valid_moves(board)
+        if not valid_moves:
+            self.terminal_hits += 1
+            return (None, 0)
+        if depth == 0:
+            self.leaf_evals += 1
+            return (None, self.evaluate_board(board, self.bot))
+
+        tt = self.tt
+        key = None
+        mirrored = False
+        if isinstance(board, Bitboard):
+            if tt is not None:
+                key, mirrored = board.canonical_key()
+                if not maximizingPlayer:
+                    key ^= SIDE_KEY
+                entry = tt.probe(key)
+                if entry is not None:
+                    tt_depth, tt_value, tt_flag, tt_move = entry
+                    if mirrored and tt_move is not None:
+                        tt_move = self.cols - 1 - tt_move
+                    if tt_depth >= depth:
+                        if tt_flag == EXACT:
+                            return tt_move, tt_value
+                        if tt_flag == LOWER and tt_value >= beta:
+                            return tt_move, tt_value
+                        if tt_flag == UPPER and tt_value <= alpha:
+                            return tt_move, tt_value
+                    if first_move is None:
+                        first_move = tt_move
+        player = self.bot if maximizingPlayer else -self.bot
+        # tactical precheck: wins, lost positions and forced blocks need no branching
+        wins, threats = self.threat_check(board, player, valid_moves)
+        if wins:
+            self.terminal_hits += 1
+            return wins[0], (math.inf if maximizingPlayer else -math.inf)
+        if len(threats) > 1:
+            self.terminal_hits += 1
+            return threats[0], (-math.inf if maximizingPlayer else math.inf)
+        if threats:
+            valid_moves = threats
+        else:
+            if isinstance(board, Bitboard) and board.key == board.mirror_key:
+                # symmetric position: a move and its mirror are worth the same
+                # (pruned only now, so mirrored threats above count twice)
+                valid_moves = self.distinct_moves(valid_moves)
+            valid_moves = self.order_moves(board, valid_moves, ply, player, first_move, wins)
+        alpha_orig, beta_orig = alpha, beta
 
         if maximizingPlayer:
             value = -math.inf
-            best_col = random.choice(valid_moves)
-            for col in valid_moves:
+            best_col = valid_moves[0]
+            for i, col in enumerate(valid_moves):
                 self.drop_piece(board, col, self.bot)
-                new_score = self.minimax(board, depth - 1, alpha, beta, False)[1]
+                if self.check_win_at(board, col):
+                    self.terminal_hits += 1
+                    new_score = math.inf
+                elif self.pvs:
+                    new_score = self.pvs_child(board, col, i, depth, alpha, beta, False, ply)
+                else:
+                    new_score = self.minimax(board, depth - 1, alpha, beta, False,
+                                             ply=ply + 1)[1]
                 self.undo_piece(board, col)
                 if new_score > value:
                     value = new_score
                     best_col = col
                 alpha = max(alpha, value)
                 if alpha >= beta:
+                    self.record_cutoff(board, col, ply, depth, player)
                     break  # pruning
-            return best_col, value
         else:
             value = math.inf
-            best_col = random.choice(valid_moves)
-            for col in valid_moves:
+            best_col = valid_moves[0]
+            for i, col in enumerate(valid_moves):
                 self.drop_piece(board, col, -self.bot)
-                new_score = self.minimax(board, depth - 1, alpha, beta, True)[1]
+                if self.check_win_at(board, col):
+                    self.terminal_hits += 1
+                    new_score = -math.inf
+                elif self.pvs:
+                    new_score = self.pvs_child(board, col, i, depth, alpha, beta, True, ply)
+                else:
+                    new_score = self.minimax(board, depth - 1, alpha, beta, True,
+                                             ply=ply + 1)[1]
                 self.undo_piece(board, col)
                 if new_score < value:
                     value = new_score
                     best_col = col
                 beta = min(beta, value)
                 if alpha >= beta:
+                    self.record_cutoff(board, col, ply, depth, player)
                     break
-            return best_col, value
+
+        if key is not None:
+            if value <= alpha_orig:
+                flag = UPPER
+            elif value >= beta_orig:
+                flag = LOWER
+            else:
+                flag = EXACT
+            tt.store(key, depth, value, flag, self.cols - 1 - best_col if mirrored else best_col)
+        return best_col, value
+
+    def pvs_child(self, board, col, i, depth, alpha, beta, maximizingPlayer, ply):
+        """Value of the child reached by the 'i'-th move 'col' (already
+        dropped), searched the PVS way; 'maximizingPlayer' is the child's side.
+
+        A move that leaves its side a win next turn is extended a ply: the
+        reply is a forced block, so this costs little and depth still drops
+        every two plies. Other moves after the first are scouted with a null
+        window, late ones at reduced depth, and only searched again at full
+        depth and with the full window when the scout says they may improve
+        on the bound.
+        """
+        mover = -self.bot if maximizingPlayer else self.bot
+        child_depth = depth - 1
+        threatens = self.creates_threat(board, col, mover)
+        if threatens:
+            child_depth = depth
+        # the parent's bound the move has to beat, as a null window; only
+        # that bound has to be finite
+        bound = beta if maximizingPlayer else alpha
+        if i == 0 or math.isinf(bound):
+            return self.minimax(board, child_depth, alpha, beta, maximizingPlayer, ply=ply + 1)[1]
+        if maximizingPlayer:  # the parent minimises: the move must come in below beta
+            scout = (beta - 1, beta)
+        else:
+            scout = (alpha, alpha + 1)
+        reduced = not threatens and i >= LMR_MOVES and depth >= LMR_MIN_DEPTH
+        value = self.minimax(board, child_depth - 1 if reduced else child_depth, *scout,
+                             maximizingPlayer, ply=ply + 1)[1]
+        if reduced and (value < beta if maximizingPlayer else value > alpha):
+            value = self.minimax(board, child_depth, *scout, maximizingPlayer, ply=ply + 1)[1]
+        if alpha < value < beta:
+            value = self.minimax(board, child_depth, alpha, beta, maximizingPlayer, ply=ply + 1)[1]
+        return value
 
     # ---------- API ----------
-    def find_best_move(self):
-        """Return best move (column index 0..6)."""
+    def find_best_move(self, time_limit=None, node_limit=None, max_depth=None,
+                       callback=None, stop_event=None):
+        """Return best move (column index 0..cols-1).
+
+        Without a budget this searches to the fixed search depth. With
+        'time_limit' (seconds) and/or 'node_limit' it deepens iteratively
+        from depth 1 and returns the move of the deepest completed iteration.
+        Afterwards self.stats describes the search; 'callback' is called
+        with SearchStats snapshots while it runs and once when it is done.
+        Setting 'stop_event' cancels the search: it returns promptly with
+        the move of the deepest completed iteration, or None if there is none.
+        """
         valid_moves = self.valid_moves()
         if not valid_moves:
             return None
-        best_col, _ = self.minimax(self.board, self.depth, -math.inf, math.inf, True)
+        self.sync_evaluator()
+        self.start_stats(callback)
+        saved_stop = self.stop_event
+        if stop_event is not None:
+            self.stop_event = stop_event
+        saved = self.copy_board()
+        try:
+            best_col = self.search(time_limit, node_limit, max_depth)
+        except SearchAborted:
+            # stopped inside a fixed-depth search, which leaves the board mid-line
+            self.board = saved
+            self.sync_evaluator()
+            best_col = self.best_move_so_far if self.completed_depth else None
+        finally:
+            self.callback = None
+            self.stop_event = saved_stop
+        board = self.board
+        if (best_col is not None and isinstance(board, Bitboard) and board.is_symmetric()
+                and self.rng.random() < 0.5):
+            # only one side of a symmetric position was searched; play
+            # either side so games still vary
+            best_col = self.cols - 1 - best_col
+        self.finish_stats(best_col, callback)
         return best_col
 
+    def search(self, time_limit=None, node_limit=None, max_depth=None):
+        move = self.book_move()
+        if move is not None:
+            return move
+        move = self.forced_move()
+        if move is not None:
+            return move
+        if self.tt is not None:
+            self.tt.new_search()
+        if self.ordering is not None:
+            self.ordering.new_search()
+        if self.solver is not None and self.solver.applies(self.board):
+            start = time.perf_counter()
+            best_col = self.solve_endgame(time_limit, node_limit)
+            if best_col is not None:
+                return best_col
+            # out of budget before the proof: fall back on the heuristic search
+            if time_limit is not None:
+                time_limit = max(0.0, time_limit - (time.perf_counter() - start))
+        if self.threats is not None:
+            start = time.perf_counter()
+            best_col = self.threat_win()
+            if best_col is not None:
+                return best_col
+            if time_limit is not None:
+                time_limit = max(0.0, time_limit - (time.perf_counter() - start))
+        if self.workers > 1 and self.smp == "lazy":
+            if self.parallel is None:
+                from parallel import LazySMPSearch
+                self.parallel = LazySMPSearch(self.workers)
+            fixed = time_limit is None and node_limit is None
+            best_col, self.best_value = self.parallel.search(
+                self, self.depth if fixed else max_depth, time_limit, node_limit)
+            return best_col
+        if time_limit is None and node_limit is None:
+            if self.workers > 1:
+                if self.parallel is None:
+                    from parallel import RootParallelSearch
+                    self.parallel = RootParallelSearch(self.workers)
+                best_col, self.best_value = self.parallel.search(self, self.depth)
+            else:
+                best_col, self.best_value = self.minimax(
+                    self.board, self.depth, -math.inf, math.inf, True)
+            self.completed_depth = self.depth
+            return best_col
+        return self.iterative_deepening(time_limit, node_limit, max_depth)
+
+    def solve_endgame(self, time_limit=None, node_limit=None):
+        """Exact best move for the bot, or None if the budget ran out first.
+
+        The solver gets SOLVER_SHARE of the budget (SOLVER_NODES without
+        one), so a failed proof leaves the fallback search time to work.
+        """
+        timed = time_limit is not None and not math.isinf(time_limit)
+        if timed:
+            self.deadline = time.perf_counter() + time_limit * SOLVER_SHARE
+        if node_limit is not None:
+            self.node_limit = int(node_limit * SOLVER_SHARE)
+        elif not timed:
+            self.node_limit = SOLVER_NODES
+        try:
+            best_col, score = self.solver.best_move(self.board, self.bot)
+        except SearchAborted:
+            if self.stop_event is not None and self.stop_event.is_set():
+                raise
+            return None
+        finally:
+            self.deadline = None
+            self.node_limit = None
+        self.solved_score = score
+        self.best_value = math.inf if score > 0 else -math.inf if score < 0 else 0
+        self.completed_depth = self.empty_cells(self.board)
+        return best_col
+
+    def threat_win(self):
+        """First move of a forced win by threats for the bot, or None.
+
+        The winning line is stored in the transposition table, where the
+        principal variation and later searches pick it up.
+        """
+        line = self.threats.prove(self.board, self.bot)
+        self.threat_nodes += self.threats.nodes
+        if line is None:
+            return None
+        self.best_value = math.inf
+        self.completed_depth = len(line)
+        if self.tt is not None:
+            board, player = self.board.copy(), self.bot
+            for i, col in enumerate(line):
+                key, mirrored = board.canonical_key()
+                if player != self.bot:
+                    key ^= SIDE_KEY
+                # every reply loses, so the bot's win is a lower bound at both sides' nodes
+                self.tt.store(key, len(line) - i, math.inf, LOWER,
+                              self.cols - 1 - col if mirrored else col)
+                board.drop(col, player)
+                player = -player
+        return line[0]
+
+    # ---------- instrumentation ----------
+    def reset_counters(self):
+        self.nodes = 0
+        self.threat_nodes = 0
+        self.leaf_evals = 0
+        self.terminal_hits = 0
+        self.cutoffs = {}
+        self.max_ply = 0
+        self.best_move_so_far = None
+
+    def start_stats(self, callback=None):
+        self.reset_counters()
+        self.completed_depth = 0
+        self.best_value = None
+        self.solved_score = None
+        self.callback = callback
+        self.search_start = time.perf_counter()
+        self.next_progress = self.search_start + self.progress_interval
+        self.tt_hits_start = self.tt.hits if self.tt is not None else 0
+
+    def snapshot(self, done=False):
+        """SearchStats for the search so far."""
+        stats = SearchStats()
+        stats.nodes = self.nodes
+        stats.leaf_evals = self.leaf_evals
+        stats.terminal_hits = self.terminal_hits
+        stats.tt_hits = self.tt.hits - self.tt_hits_start if self.tt is not None else 0
+        stats.cutoffs = dict(self.cutoffs)
+        stats.depth = self.completed_depth
+        stats.max_depth = self.max_ply
+        stats.elapsed = time.perf_counter() - self.search_start
+        stats.best_move = self.best_move_so_far
+        stats.value = self.best_value
+        stats.exact = self.solved_score
+        stats.threat_nodes = self.threat_nodes
+        stats.done = done
+        return stats
+
+    def finish_stats(self, best_col, callback=None):
+        self.best_move_so_far = best_col
+        stats = self.snapshot(done=True)
+        stats.pv = self.principal_variation(best_col, max(self.completed_depth, 1))
+        self.stats = stats
+        if callback is not None:
+            callback(stats)
+
+    def principal_variation(self, first_move, length):
+        """Best line from the root, following best moves stored in the TT."""
+        if first_move is None:
+            return []
+        pv = [first_move]
+        if self.tt is None or not isinstance(self.board, Bitboard):
+            return pv
+        board = self.board.copy()
+        player = self.bot
+        col = first_move
+        while len(pv) < length:
+            board.drop(col, player)
+            if board.has_won(player) or board.is_full():
+                break
+            player = -player
+            key, mirrored = board.canonical_key()
+            if player != self.bot:
+                key ^= SIDE_KEY
+            entry = self.tt.probe(key)
+            if entry is None or entry[3] is None:
+                break
+            col = self.cols - 1 - entry[3] if mirrored else entry[3]
+            if board.heights[col] >= self.rows:
+                break
+            pv.append(col)
+        return pv
+
+    def book_move(self):
+        """Move from the opening book for the current position, or None."""
+        if self.book is None or not isinstance(self.board, Bitboard):
+            return None
+        if self.side_to_move(self.board) != self.bot:
+            return None
+        key, mirrored = self.board.canonical_key()
+        entry = self.book.lookup(key)
+        if entry is None:
+            return None
+        move, value, depth = entry
+        if mirrored:
+            move = self.cols - 1 - move
+        if move not in self.valid_moves():
+            return None
+        self.best_value, self.completed_depth = value, depth
+        return move
+
+    def iterative_deepening(self, time_limit=None, node_limit=None, max_depth=None,
+                            start_depth=2):
+        if max_depth is None:
+            max_depth = self.empty_cells(self.board)
+        saved = self.copy_board()
+        best_col, value = self.minimax(self.board, 1, -math.inf, math.inf, True)
+        self.completed_depth = 1
+        self.best_value = value
+        self.best_move_so_far = best_col
+
+        # depth 1 always completes; the budget applies from depth 2 on
+        if time_limit is not None:
+            self.deadline = time.perf_counter() + time_limit
+        self.node_limit = node_limit
+        try:
+            for depth in range(start_depth, max_depth + 1):
+                if math.isinf(value):
+                    break  # forced result already proven
+                alpha, beta = value - ASPIRATION_WINDOW, value + ASPIRATION_WINDOW
+                col, score = self.minimax(self.board, depth, alpha, beta, True, best_col)
+                if score <= alpha or score >= beta:
+                    # fell outside the aspiration window, re-search in full
+                    col, score = self.minimax(self.board, depth, -math.inf, math.inf,
+                                              True, best_col)
+                best_col, value = col, score
+                self.completed_depth = depth
+                self.best_value = value
+                self.best_move_so_far = best_col
+                if self.callback is not None:
+                    self.callback(self.snapshot())
+        except SearchAborted:
+            self.board = saved
+            self.sync_evaluator()
+        finally:
+            self.deadline = None
+            self.node_limit = None
+        return best_col
+
+    def ponder(self, stop_event, max_depth=None):
+        """Think on the opponent's time until 'stop_event' is set.
+
+        The side to move must be the opponent. Every reply is searched one
+        ply deeper per pass, on a private copy of the board, so the TT holds
+        a result for whichever move is played. Returns and keeps in
+        self.ponder_depths the depth searched for the bot after each reply.
+        """
+        opponent = -self.bot
+        board = self.copy_board()
+        replies = self.valid_moves(board)
+        symmetric = isinstance(board, Bitboard) and board.is_symmetric()
+        if symmetric:
+            replies = self.distinct_moves(replies)  # mirrors share TT entries
+        if self.evaluator is not None:
+            self.evaluator.attach(board)
+        if self.tt is not None:
+            self.tt.new_search()
+        saved_stop, self.stop_event = self.stop_event, stop_event
+        self.reset_counters()
+        if max_depth is None:
+            max_depth = self.empty_cells(board) - 1
+        depths = self.ponder_depths = {}
+        try:
+            for depth in range(1, max_depth + 1):
+                for col in self.order_moves(board, replies, 1, opponent):
+                    if self.would_win(board, col, opponent):
+                        continue  # game over after this reply, nothing to prepare
+                    self.drop_piece(board, col, opponent)
+                    self.minimax(board, depth, -math.inf, math.inf, True)
+                    self.undo_piece(board, col)
+                    depths[col] = depth
+                    if symmetric:
+                        depths[self.cols - 1 - col] = depth
+        except SearchAborted:
+            pass
+        finally:
+            self.stop_event = saved_stop
+            self.sync_evaluator()
+        return depths
+
+    def close(self):
+        """Shut down the worker pool, if one was started."""
+        if self.parallel is not None:
+            self.parallel.close()
+            self.parallel = None
+
+    def load_moves(self, moves):
+        """Replay 'moves' (columns, X first) on a fresh board.
+
+        Unlike reset(), the transposition table and move-ordering state
+        are kept, so an engine can be reused across positions.
+        """
+        self.board = self.new_board()
+        self.moves = []
+        self.sync_evaluator()
+        player = PLAYER_X
+        for col in moves:
+            if self.game_over() or not 0 <= col < self.cols or not self.play(col, player):
+                raise ValueError(f"illegal move {col} after {self.moves}")
+            player = -player
+
+    def load_position(self, text):
+        """Set up the board from rows listed top-down, separated by '/'.
+
+        Cells are 'X', 'O' or '.', e.g. '......./......./...X...' with one
+        row per board row. The move order is unknown, so self.moves stays
+        empty and winner() scans the whole board; raises ValueError if the
+        rows do not describe a legal board.
+        """
+        rows = text.strip().split("/")
+        if len(rows) != self.rows or any(len(row) != self.cols for row in rows):
+            raise ValueError(f"position must be {self.rows} rows of {self.cols} cells")
+        symbols = {".": EMPTY, "X": PLAYER_X, "O": PLAYER_O}
+        try:
+            grid = [[symbols[ch] for ch in row.upper()] for row in rows]
+        except KeyError as e:
+            raise ValueError(f"unknown cell {e.args[0]!r}") from None
+        for r in range(1, self.rows):
+            for c in range(self.cols):
+                if grid[r][c] == EMPTY and grid[r - 1][c] != EMPTY:
+                    raise ValueError(f"floating piece in column {c}")
+        x = sum(row.count(PLAYER_X) for row in grid)
+        o = sum(row.count(PLAYER_O) for row in grid)
+        if x - o not in (0, 1):
+            raise ValueError(f"{x} X pieces and {o} O pieces cannot alternate")
+        if self.use_bitboard:
+            self.board = Bitboard.from_list(grid, self.n)
+        else:
+            self.board = grid
+        self.moves = []
+        self.sync_evaluator()
+
     def play(self, col, player=None):
         """Make a move on internal board."""
         if player is None:
             player = self.bot
-        return self.drop_piece(self.board, col, player)
+        if not self.drop_piece(self.board, col, player):
+            return False
+        self.moves.append(col)
+        return True
 
     def display(self):
         print()
@@ -215,18 +1191,38 @@ class ConnectN:
         print(" " + " ".join(map(str, range(self.cols))))
         print()
 
+    def winner(self):
+        """Player whose last move completed a line, or None."""
+        if not self.moves:
+            # loaded with load_position, or empty: no last move to look at
+            for player in (PLAYER_X, PLAYER_O):
+                if self.check_win(self.board, player):
+                    return player
+            return None
+        col = self.moves[-1]
+        if not self.check_win_at(self.board, col):
+            return None
+        return self.board[self.top_row(self.board, col)][col]
+
     def game_over(self):
-        return self.check_win(self.board, PLAYER_X) or \
-               self.check_win(self.board, PLAYER_O) or \
-               self.is_draw(self.board)
+        return self.winner() is not None or self.is_draw(self.board)
 
 
 
 if __name__ == "__main__":
-    print("=== Connect-N (6x7) AI ===")
+    print("=== Connect-N AI ===")
     try:
-        n = int(input("Enter N (3–6): "))
-        if not (3 <= n <= 6):
+        size = input(f"Enter board size ROWSxCOLS (default {ROWS}x{COLS}): ").strip().lower()
+        rows, cols = (int(x) for x in size.split("x")) if size else (ROWS, COLS)
+        if rows < 4 or cols < 4:
+            raise ValueError
+    except ValueError:
+        rows, cols = ROWS, COLS
+
+    max_n = max(rows, cols)
+    try:
+        n = int(input(f"Enter N (3–{max_n}): "))
+        if not (3 <= n <= max_n):
             n = 4
     except ValueError:
         n = 4
@@ -245,9 +1241,9 @@ if __name__ == "__main__":
         human_first = True
 
     bot_player = PLAYER_O if human_first else PLAYER_X
-    game = ConnectN(n=n, search_depth=depth, bot_player=bot_player)
+    game = ConnectN(n=n, search_depth=depth, bot_player=bot_player, rows=rows, cols=cols)
 
-    print(f"\nGame started! Connect {n} on a 6x7 board.")
+    print(f"\nGame started! Connect {n} on a {rows}x{cols} board.")
     print(f"You are {'O' if human_first else 'X'}; AI is {'X' if human_first else 'O'}.\n")
 
     current_player = PLAYER_X  # X always starts
@@ -267,24 +1263,24 @@ if __name__ == "__main__":
             valid = False
             while not valid:
                 try:
-                    move = int(input("Enter column (0–6): "))
-                    if move not in range(7):
+                    move = int(input(f"Enter column (0–{cols - 1}): "))
+                    if move not in range(cols):
                         raise ValueError
                     if not game.play(move, -game.bot):
                         print("Column full. Try again.")
                         continue
                     valid = True
                 except ValueError:
-                    print("Invalid input. Please enter 0–6.")
+                    print(f"Invalid input. Please enter 0–{cols - 1}.")
         # Switch turns
         current_player *= -1
 
     game.display()
     # Determine winner
-    if game.check_win(game.board, PLAYER_X):
+    winner = game.winner()
+    if winner == PLAYER_X:
         print("Player X wins!")
-    elif game.check_win(game.board, PLAYER_O):
+    elif winner == PLAYER_O:
         print("Player O wins!")
     else:
         print("It's a draw!")
-
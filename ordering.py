@@ -0,0 +1,62 @@
+class MoveOrderer:
+    """Move ordering for alpha-beta: hint move, immediate wins, killers, history.
+
+    Remaining moves are sorted by their history score, with columns
+    nearer the centre first when scores tie. Killers are kept per ply,
+    history per (player, landing cell); both are fed by beta cutoffs.
+    """
+
+    def __init__(self, rows, cols, killer_slots=2):
+        self.rows = rows
+        self.cols = cols
+        self.killer_slots = killer_slots
+        center = cols // 2
+        # larger is better; symmetric columns share a rank
+        self.center_rank = [-abs(c - center) for c in range(cols)]
+        self.clear()
+
+    def clear(self):
+        self.killers = []
+        self.history = {}  # player -> score per landing cell
+
+    def history_table(self, player):
+        table = self.history.get(player)
+        if table is None:
+            table = self.history[player] = [0] * (self.cols * (self.rows + 1))
+        return table
+
+    def new_search(self):
+        """Forget killers and age history between searches."""
+        self.killers = []
+        for table in self.history.values():
+            for i, v in enumerate(table):
+                table[i] = v >> 1
+
+    def order(self, moves, ply, player, cells, first=None, wins=()):
+        """Return 'moves' best-first; 'cells' holds each move's landing cell."""
+        killers = self.killers[ply] if ply < len(self.killers) else ()
+        history = self.history_table(player)
+        center_rank = self.center_rank
+
+        def key(i):
+            col = moves[i]
+            if col == first:
+                return (3, 0, 0)
+            if col in wins:
+                return (2, 0, 0)
+            if col in killers:
+                return (1, -killers.index(col), 0)
+            return (0, history[cells[i]], center_rank[col])
+
+        return [moves[i] for i in sorted(range(len(moves)), key=key, reverse=True)]
+
+    def record_cutoff(self, col, cell, ply, depth, player):
+        """Credit a move that caused a beta cutoff."""
+        while len(self.killers) <= ply:
+            self.killers.append([])
+        killers = self.killers[ply]
+        if col in killers:
+            killers.remove(col)
+        killers.insert(0, col)
+        del killers[self.killer_slots:]
+        self.history_table(player)[cell] += depth * depth
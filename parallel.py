@@ -0,0 +1,330 @@
+import math
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from logic import Bitboard, ConnectN, SearchAborted, PLAYER_X, PLAYER_O
+from transposition import SharedTranspositionTable
+
+POLL_INTERVAL = 0.05  # seconds between cancellation checks while waiting on workers
+
+# per-process state of a pool worker
+_engine = None
+_stop_event = None
+_smp_engine = None
+_smp_table = None
+
+
+def _init_worker(stop_event):
+    global _stop_event
+    _stop_event = stop_event
+
+
+def _worker_engine(n, rows, cols, bot, core, tt_size):
+    """Engine reused by this worker across tasks, so its TT stays warm."""
+    global _engine
+    if (_engine is None
+            or (_engine.n, _engine.rows, _engine.cols, _engine.bot, _engine.search_core)
+            != (n, rows, cols, bot, core)):
+        _engine = ConnectN(n=n, bot_player=bot, tt_size=tt_size, rows=rows, cols=cols,
+                           search_core=core)
+        _engine.stop_event = _stop_event
+    return _engine
+
+
+def search_root_move(n, rows, cols, bot, core, tt_size, board, col, depth, alpha, beta):
+    """Search root move 'col' in a worker; returns (col, value, nodes).
+
+    'value' is None when the search was stopped before finishing.
+    """
+    game = _worker_engine(n, rows, cols, bot, core, tt_size)
+    game.board = board
+    game.sync_evaluator()
+    game.nodes = 0
+    if game.tt is not None:
+        game.tt.new_search()
+    game.drop_piece(board, col, bot)
+    if game.check_win_at(board, col):
+        return col, math.inf, 1
+    try:
+        value = game.minimax(board, depth - 1, alpha, beta, False, ply=1)[1]
+    except SearchAborted:
+        return col, None, game.nodes
+    return col, value, game.nodes
+
+
+class RootParallelSearch:
+    """Splits the root moves of a fixed-depth search across worker processes.
+
+    The best-ordered move is searched first to get a bound; the rest are
+    handed out as workers free up, each with the best value found so far
+    as its alpha. Once a forced win is found the remaining subtrees can no
+    longer improve the result: queued ones are cancelled and running ones
+    are stopped through a shared event. Results are merged in root order,
+    so the chosen move does not depend on which worker finished first.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.stop_event = multiprocessing.Event()
+        self.pool = None
+        self.nodes = 0
+        self.elapsed = 0.0
+
+    def _ensure_pool(self):
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.stop_event,))
+        return self.pool
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+    def search(self, game, depth):
+        """Return (best_col, value) for game.bot, like game.minimax at 'depth'."""
+        start = time.perf_counter()
+        self.nodes = 0
+        board = game.board
+        moves = game.valid_moves()
+        if not moves:
+            return None, 0
+        wins = game.winning_moves(board, game.bot, moves)
+        if wins:
+            return wins[0], math.inf
+        if isinstance(board, Bitboard) and board.is_symmetric():
+            moves = game.distinct_moves(moves)
+        order = game.order_moves(board, moves, 0, game.bot)
+        if depth <= 1 or len(order) == 1:
+            return game.minimax(board, depth, -math.inf, math.inf, True)
+
+        pool = self._ensure_pool()
+        self.stop_event.clear()
+        tt_size = game.tt.size if game.tt is not None else 0
+        job = (game.n, game.rows, game.cols, game.bot, game.search_core, tt_size, board)
+
+        def submit(col, alpha):
+            # alpha - 1 keeps ties exact, so equal moves merge by root order
+            bound = alpha - 1 if not math.isinf(alpha) else alpha
+            return pool.submit(search_root_move, *job, col, depth, bound, math.inf)
+
+        first = submit(order[0], -math.inf)
+        _wait_or_abort(game, {first}, self.stop_event)
+        col, alpha, nodes = first.result()
+        self.nodes += nodes
+        results = {col: alpha}
+
+        queue = iter(order[1:])
+        running = set()
+        for col in queue:
+            running.add(submit(col, alpha))
+            if len(running) >= self.workers:
+                break
+        while running:
+            done, running = _wait_or_abort(game, running, self.stop_event)
+            for future in done:
+                col, value, nodes = future.result()
+                self.nodes += nodes
+                if value is None:
+                    continue
+                results[col] = value
+                alpha = max(alpha, value)
+            if alpha == math.inf:
+                self.stop_event.set()
+                for future in running:
+                    future.cancel()
+                wait(running)
+                for future in running:
+                    if not future.cancelled():
+                        self.nodes += future.result()[2]
+                break
+            for col in queue:
+                running.add(submit(col, alpha))
+                if len(running) >= self.workers:
+                    break
+
+        best_col, best = None, -math.inf
+        for col in order:
+            if col in results and (best_col is None or results[col] > best):
+                best_col, best = col, results[col]
+        game.nodes += self.nodes
+        self.elapsed = time.perf_counter() - start
+        return best_col, best
+
+
+def _wait_or_abort(game, futures, stop_event, others=()):
+    """wait() for the first of 'futures' to finish, meanwhile checking the
+    caller's stop event and deadline through game.poll_search().
+
+    On cancellation every worker, including the 'others' still running,
+    is stopped through 'stop_event' and SearchAborted is raised once they
+    have all returned.
+    """
+    while True:
+        done, pending = wait(futures, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+        if done:
+            return done, pending
+        if game.poll_search():
+            stop_event.set()
+            everything = set(futures) | set(others)
+            for future in everything:
+                future.cancel()
+            wait(everything)
+            raise SearchAborted
+
+
+def _lazy_smp_engine(n, rows, cols, bot, core, table_name, table_size, workers):
+    """Engine of this worker wired to the shared table, reused across tasks."""
+    global _smp_engine, _smp_table
+    if _smp_table is None or _smp_table.name != table_name:
+        if _smp_table is not None:
+            _smp_table.close()
+        _smp_table = SharedTranspositionTable.attach(table_name, table_size, workers, 0)
+        _smp_engine = None
+    if (_smp_engine is None
+            or (_smp_engine.n, _smp_engine.rows, _smp_engine.cols, _smp_engine.bot,
+                _smp_engine.search_core) != (n, rows, cols, bot, core)):
+        _smp_engine = ConnectN(n=n, bot_player=bot, tt_size=0, rows=rows, cols=cols,
+                               search_core=core)
+        _smp_engine.stop_event = _stop_event
+        _smp_engine.tt = _smp_table
+    return _smp_engine
+
+
+def lazy_smp_search(n, rows, cols, bot, core, table_name, table_size, workers, board,
+                    worker_id, depth, time_limit, node_limit):
+    """One Lazy SMP worker: iterative deepening on the shared table.
+
+    Returns (worker_id, best_col, value, completed_depth, nodes).
+    """
+    game = _lazy_smp_engine(n, rows, cols, bot, core, table_name, table_size, workers)
+    table = game.tt
+    table.worker_id = worker_id
+    table.reset_stats()
+    game.board = board
+    game.sync_evaluator()
+    game.nodes = 0
+    # helpers shuffle the root differently and start at staggered depths,
+    # so they fill the table with entries the main worker has not reached
+    game.rng = random.Random(worker_id)
+    if game.ordering is not None:
+        game.ordering.clear()
+    max_depth = depth + worker_id % 2 if depth is not None else None
+    col = game.iterative_deepening(time_limit, node_limit, max_depth,
+                                   start_depth=2 + worker_id % 3)
+    table.flush_stats(game.nodes)
+    return worker_id, col, game.best_value, game.completed_depth, game.nodes
+
+
+class LazySMPSearch:
+    """Lazy SMP: every worker searches the whole position, sharing one TT.
+
+    Worker 0 is the main search; helpers run the same iterative deepening
+    with different root orders and staggered depths and only contribute
+    through the shared table. When worker 0 finishes (or the time runs out)
+    the helpers are stopped and the deepest completed result is returned,
+    preferring lower worker ids on equal depth.
+    """
+
+    def __init__(self, workers=None, tt_size=1 << 20):
+        self.workers = workers or os.cpu_count() or 1
+        self.table = SharedTranspositionTable(tt_size, self.workers)
+        self.stop_event = multiprocessing.Event()
+        self.pool = None
+        self.nodes = 0
+        self.elapsed = 0.0
+        self.depths = []
+
+    def _ensure_pool(self):
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.stop_event,))
+        return self.pool
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+        if self.table is not None:
+            self.table.close()
+            self.table = None
+
+    def search(self, game, depth=None, time_limit=None, node_limit=None):
+        """Return (best_col, value) for game.bot to 'depth' or within the budget.
+
+        'node_limit' is split evenly across the workers.
+        """
+        start = time.perf_counter()
+        moves = game.valid_moves()
+        if not moves:
+            return None, 0
+        if depth is None and time_limit is None and node_limit is None:
+            depth = game.depth
+        if node_limit is not None:
+            node_limit = max(1, node_limit // self.workers)
+        pool = self._ensure_pool()
+        self.stop_event.clear()
+        self.table.new_search()
+        job = (game.n, game.rows, game.cols, game.bot, game.search_core, self.table.name,
+               self.table.size, self.workers, game.board)
+        futures = [pool.submit(lazy_smp_search, *job, worker_id, depth, time_limit, node_limit)
+                   for worker_id in range(self.workers)]
+        _wait_or_abort(game, {futures[0]}, self.stop_event, others=futures[1:])
+        self.stop_event.set()
+        results = [future.result() for future in futures]
+
+        _, best_col, value, best_depth, _ = results[0]
+        for _, col, score, completed, _ in results[1:]:
+            if completed > best_depth and col is not None:
+                best_col, value, best_depth = col, score, completed
+        self.nodes = sum(r[4] for r in results)
+        self.depths = [r[3] for r in results]
+        self.elapsed = time.perf_counter() - start
+        game.nodes += self.nodes
+        game.completed_depth = best_depth
+        return best_col, value
+
+    def stats(self):
+        """Effective nodes/sec and shared-table counters across all workers."""
+        stats = self.table.stats()
+        stats.update(
+            workers=self.workers,
+            nodes=self.nodes,
+            elapsed=self.elapsed,
+            nps=self.nodes / self.elapsed if self.elapsed else 0.0,
+            depths=self.depths,
+        )
+        return stats
+
+
+if __name__ == "__main__":
+    # serial vs root-parallel on a few fixed positions
+    positions = [[], [3, 3], [3, 2, 3, 4], [3, 3, 2, 4, 1, 5]]
+    depth = 10
+    search = RootParallelSearch()
+    for moves in positions:
+        timings = []
+        for parallel in (False, True):
+            game = ConnectN(n=4, search_depth=depth, seed=0)
+            player = PLAYER_X
+            for col in moves:
+                game.play(col, player)
+                player = PLAYER_O if player == PLAYER_X else PLAYER_X
+            game.bot = player
+            t = time.perf_counter()
+            if parallel:
+                col, value = search.search(game, depth)
+            else:
+                col, value = game.minimax(game.board, depth, -math.inf, math.inf, True)
+            timings.append((col, value, time.perf_counter() - t))
+        (s_col, s_val, s_t), (p_col, p_val, p_t) = timings
+        print(f"moves={moves}: serial {s_col} ({s_val}) {s_t:.2f}s, "
+              f"parallel {p_col} ({p_val}) {p_t:.2f}s, x{s_t / p_t:.1f}")
+    search.close()
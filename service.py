@@ -0,0 +1,370 @@
+import argparse
+import asyncio
+import collections
+import functools
+import json
+import math
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from logic import ConnectN, PLAYER_X, ROWS, COLS
+
+# Asyncio front end for hosting many games at once:
+#   async with EngineService(workers=4, n=4) as engine:
+#       col = await engine.best_move(game_id, moves, budget)
+# 'moves' are the game's columns so far (X first), 'budget' the seconds to
+# think (None: the fixed search depth). Each worker process keeps the warm
+# engines (transposition table, move-ordering history, last PV) of the
+# games routed to it, least recently used evicted first. At most
+# 'max_pending' searches are queued on the workers; further callers wait
+# for a slot, and with 'max_waiting' set, callers beyond that many waiting
+# get ServiceBusy straight away.
+#
+# 'python service.py serve' exposes it over TCP, one JSON request per line:
+#   {"game": "g1", "moves": [3, 3], "budget": 0.1}
+#   -> {"game": "g1", "move": 2, "value": 12, "depth": 7, "nodes": ..., "pv": [...]}
+# failures come back as {"game": ..., "error": "..."}, "busy" when shed.
+# 'python service.py loadtest' plays self-play games through the service.
+
+
+class ServiceBusy(Exception):
+    """Raised by EngineService when too many requests are already waiting."""
+
+
+STOP_ALL = 0  # cancellation value that stops whatever a worker is running
+
+
+# ---------- worker side ----------
+class RequestStop:
+    """Stop flag for the request a worker is running.
+
+    The parent writes the number of the request to cancel into a shared
+    value, so a cancel that arrives late can never stop the next request.
+    """
+
+    def __init__(self, cancelled):
+        self.cancelled = cancelled
+        self.request = None
+
+    def is_set(self):
+        return self.cancelled.value in (self.request, STOP_ALL)
+
+
+_games = collections.OrderedDict()  # game id -> ConnectN, least recently used first
+_stop = None
+
+
+def _init_worker(cancelled):
+    global _stop
+    _stop = RequestStop(cancelled)
+
+
+def search_game(request, game_id, moves, budget, options, capacity):
+    """Search the position after 'moves' on the game's warm engine.
+
+    Returns the result record; raises ValueError for illegal or finished games.
+    """
+    game = _games.pop(game_id, None)
+    if game is None:
+        game = ConnectN(**options)
+        game.stop_event = _stop
+    _games[game_id] = game
+    while len(_games) > capacity:
+        _games.popitem(last=False)[1].close()
+    _stop.request = request
+
+    game.load_moves(moves)
+    if game.game_over():
+        raise ValueError("game is over")
+    game.bot = game.side_to_move(game.board)
+    move = game.find_best_move(time_limit=budget)
+    stats = game.stats
+    value = stats.value
+    if value is not None and math.isinf(value):
+        value = "win" if value > 0 else "loss"
+    return {"move": move, "value": value, "depth": stats.depth, "nodes": stats.nodes,
+            "time": stats.elapsed, "pv": stats.pv}
+
+
+# ---------- service ----------
+class GameState:
+    """What the service remembers about one game."""
+
+    def __init__(self, worker):
+        self.worker = worker  # every search of the game runs there, where its engine is warm
+        self.searches = 0
+        self.last = None  # last result record, including its PV
+
+
+class EngineService:
+    """Searches positions of many concurrent games on a bounded process pool.
+
+    Each worker is a one-process pool, so a game always lands on the same
+    process and reuses its engine; new games go to the worker with the
+    fewest games. Keyword arguments besides the service's own are engine
+    options, passed to ConnectN in the workers.
+
+    Every warm engine keeps its transposition table, about 5 MB at the
+    default tt_size, so a worker holds up to 'games_per_worker' times
+    that; pass a smaller tt_size to keep more games warm.
+    """
+
+    def __init__(self, workers=None, max_pending=None, max_waiting=None,
+                 games_per_worker=16, **engine_options):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or 2 * self.workers
+        self.max_waiting = max_waiting
+        self.games_per_worker = games_per_worker
+        self.options = engine_options
+        self.games = collections.OrderedDict()  # game id -> GameState, least recently used first
+        self.assigned = [0] * self.workers  # games per worker
+        self.pools = [None] * self.workers
+        # per worker, the number of the request to stop (see RequestStop)
+        self.cancelled = [multiprocessing.Value("q", -1) for _ in range(self.workers)]
+        self.last_request = 0
+        self.slots = asyncio.Semaphore(self.max_pending)
+        self.waiting = 0
+        self.pending = 0
+        self.counters = collections.Counter()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    def _detach_pools(self):
+        """Stop every worker's search and hand back the pools to shut down."""
+        pools = []
+        for i, pool in enumerate(self.pools):
+            if pool is not None:
+                self.cancelled[i].value = STOP_ALL
+                pools.append(pool)
+                self.pools[i] = None
+        return pools
+
+    def close(self):
+        for pool in self._detach_pools():
+            pool.shutdown(cancel_futures=True)
+
+    async def aclose(self):
+        """Like close, waiting for the workers off the event loop."""
+        pools = self._detach_pools()
+        loop = asyncio.get_running_loop()
+        for pool in pools:
+            await loop.run_in_executor(None, functools.partial(pool.shutdown, cancel_futures=True))
+
+    def _pool(self, worker):
+        if self.pools[worker] is None:
+            self.pools[worker] = ProcessPoolExecutor(
+                max_workers=1, initializer=_init_worker,
+                initargs=(self.cancelled[worker],))
+        return self.pools[worker]
+
+    def game_state(self, game_id):
+        """State of 'game_id', made most recently used; new games get a worker."""
+        state = self.games.pop(game_id, None)
+        if state is None:
+            worker = self.assigned.index(min(self.assigned))
+            state = GameState(worker)
+            self.assigned[worker] += 1
+        self.games[game_id] = state
+        # a game forgotten here may land on another worker next time and start cold
+        while len(self.games) > self.workers * self.games_per_worker:
+            _, old = self.games.popitem(last=False)
+            self.assigned[old.worker] -= 1
+        return state
+
+    async def best_move(self, game_id, moves, budget=None):
+        """Best column for the side to move after 'moves' in game 'game_id'."""
+        return (await self.analyse(game_id, moves, budget))["move"]
+
+    async def analyse(self, game_id, moves, budget=None):
+        """Search like best_move, returning the whole result record."""
+        self.counters["requests"] += 1
+        if self.max_waiting is not None and self.slots.locked() and self.waiting >= self.max_waiting:
+            self.counters["rejected"] += 1
+            raise ServiceBusy(f"{self.waiting} requests already waiting")
+        self.waiting += 1
+        try:
+            await self.slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.pending += 1
+        try:
+            state = self.game_state(game_id)
+            self.last_request += 1
+            request = self.last_request
+            future = self._pool(state.worker).submit(
+                search_game, request, game_id, list(moves), budget, self.options,
+                self.games_per_worker)
+            try:
+                result = await asyncio.wrap_future(future)
+            except asyncio.CancelledError:
+                if not future.cancel() and not future.done():
+                    # already running: stop it, its worker is needed for the next request
+                    self.cancelled[state.worker].value = request
+                raise
+            except ValueError:
+                self.counters["errors"] += 1
+                raise
+            state.searches += 1
+            state.last = result
+            self.counters["completed"] += 1
+            return result
+        finally:
+            self.pending -= 1
+            self.slots.release()
+
+    def status(self):
+        return {
+            "workers": self.workers,
+            "games": len(self.games),
+            "waiting": self.waiting,
+            "pending": self.pending,
+            **self.counters,
+        }
+
+
+# ---------- TCP stand-in ----------
+async def serve(service, host="127.0.0.1", port=8765):
+    """Answer JSON-line requests on 'host':'port' until cancelled."""
+
+    async def handle(reader, writer):
+        lock = asyncio.Lock()
+        tasks = set()
+
+        async def answer(line):
+            reply = {"game": None}
+            try:
+                request = json.loads(line)
+                reply["game"] = request["game"]
+                reply.update(await service.analyse(
+                    request["game"], request.get("moves", []), request.get("budget")))
+            except ServiceBusy:
+                reply["error"] = "busy"
+            except (ValueError, KeyError, TypeError) as e:
+                reply["error"] = str(e) or type(e).__name__
+            async with lock:
+                writer.write((json.dumps(reply) + "\n").encode())
+                await writer.drain()
+
+        try:
+            # requests of one connection run concurrently; replies carry the game id
+            while line := await reader.readline():
+                task = asyncio.create_task(answer(line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    async with server:
+        await server.serve_forever()
+
+
+# ---------- load test ----------
+async def self_play(service, game_id, budget, rng, latencies):
+    """Play one game through 'service', the engine taking both sides."""
+    options = service.options
+    game = ConnectN(n=options.get("n", 4), rows=options.get("rows", ROWS),
+                    cols=options.get("cols", COLS), tt_size=0, move_ordering=False,
+                    incremental_eval=False, threat_nodes=0, endgame_threshold=0)
+    player = PLAYER_X
+    # a random first move or two so the games differ
+    for _ in range(rng.randint(0, 2)):
+        game.play(rng.choice(game.valid_moves()), player)
+        player = -player
+    while not game.game_over():
+        start = time.perf_counter()
+        try:
+            col = await service.best_move(game_id, game.moves, budget)
+        except ServiceBusy:
+            await asyncio.sleep(0.05 + rng.random() * 0.05)  # back off and retry
+            continue
+        latencies.append(time.perf_counter() - start)
+        game.play(col, player)
+        player = -player
+
+
+async def load_test(service, games, concurrency, budget, seed=0):
+    """Play 'games' self-play games, at most 'concurrency' at a time."""
+    rng = random.Random(seed)
+    latencies = []
+    running = asyncio.Semaphore(concurrency)
+
+    async def one(game_id):
+        async with running:
+            await self_play(service, game_id, budget, random.Random(rng.random()), latencies)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(f"game-{i}") for i in range(games)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else 0.0
+
+    return {
+        "games": games,
+        "moves": len(latencies),
+        "elapsed": elapsed,
+        "moves_per_sec": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_p50": percentile(0.50),
+        "latency_p95": percentile(0.95),
+        "latency_p99": percentile(0.99),
+        "latency_max": latencies[-1] if latencies else 0.0,
+        **service.status(),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Asyncio Connect-N engine service.")
+    parser.add_argument("mode", choices=("serve", "loadtest"))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-pending", type=int, default=None,
+                        help="searches queued on the workers at once (default 2 per worker)")
+    parser.add_argument("--max-waiting", type=int, default=None,
+                        help="requests allowed to wait for a slot before 'busy' (default no limit)")
+    parser.add_argument("--games-per-worker", type=int, default=16,
+                        help="warm engines kept per worker (about 5 MB each)")
+    parser.add_argument("--n", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=ROWS)
+    parser.add_argument("--cols", type=int, default=COLS)
+    parser.add_argument("--depth", type=int, default=5, help="search depth without a budget")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--games", type=int, default=20, help="loadtest: games to play")
+    parser.add_argument("--concurrency", type=int, default=10,
+                        help="loadtest: games in progress at once")
+    parser.add_argument("--budget", type=float, default=0.05, help="loadtest: seconds per move")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if not 3 <= args.n <= max(args.rows, args.cols):
+        parser.error(f"N={args.n} does not fit a {args.rows}x{args.cols} board")
+
+    async def main():
+        async with EngineService(args.workers, args.max_pending, args.max_waiting,
+                                 args.games_per_worker, n=args.n, rows=args.rows,
+                                 cols=args.cols, search_depth=args.depth,
+                                 seed=args.seed) as service:
+            if args.mode == "serve":
+                print(f"serving on {args.host}:{args.port}", flush=True)
+                await serve(service, args.host, args.port)
+            else:
+                report = await load_test(service, args.games, args.concurrency,
+                                         args.budget, args.seed)
+                print(json.dumps(report, indent=1))
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,169 @@
+import random
+
+from logic import SearchAborted
+from transposition import EXACT, LOWER, UPPER
+
+# xor-ed into the position hash for solver entries, so they never mix with
+# the heuristic search's entries in a shared transposition table
+SOLVE_KEY = random.Random(0x501E).getrandbits(64)
+
+
+class EndgameSolver:
+    """Exact negamax solver for positions with few empty cells.
+
+    Scores are from the side to move's point of view: 0 for a draw,
+    otherwise a win counts the cells still empty after the winning move
+    plus one, so faster wins score higher and slower losses are preferred.
+    The root score is found with null-window searches that bisect the
+    possible range (MTD style); inside, moves after the first are tried
+    with a null window and re-searched only when they fail high (PVS).
+    Results are cached in the game's transposition table.
+    """
+
+    def __init__(self, game, threshold):
+        self.game = game
+        self.threshold = threshold
+        cols = game.cols
+        self.order = sorted(range(cols), key=lambda c: abs(c - (cols - 1) / 2))
+
+    def applies(self, board):
+        return self.game.empty_cells(board) < self.threshold
+
+    def best_move(self, board, player):
+        """Return (col, score) of an optimal move for 'player' to move."""
+        board = board.copy()
+        game = self.game
+        empties = game.empty_cells(board)
+        moves = board.valid_moves()
+        for col in moves:
+            if game.would_win(board, col, player):
+                return col, empties
+        score = self.solve(board, player)
+        # the first move whose reply is no better for the opponent than -score
+        for col in self.candidates(board, player):
+            board.drop(col, player)
+            reply = self.negamax(board, -player, -score, -score + 1, empties - 1)
+            board.undo(col)
+            if reply <= -score:
+                return col, score
+        return moves[0], score  # not reached with consistent bounds
+
+    def solve(self, board, player):
+        """Exact score of 'board' with 'player' to move."""
+        empties = self.game.empty_cells(board)
+        lo, hi = -empties, empties
+        while lo < hi:
+            mid = lo + (hi - lo) // 2
+            # probe near zero first: most endgame scores are small
+            if mid <= 0 and lo // 2 < mid:
+                mid = lo // 2
+            elif mid >= 0 and hi // 2 > mid:
+                mid = hi // 2
+            score = self.negamax(board, player, mid, mid + 1, empties)
+            if score <= mid:
+                hi = score
+            else:
+                lo = score
+        return lo
+
+    def candidates(self, board, player):
+        """Moves worth trying: forced blocks first, never a move that lets
+        the opponent win on top of it unless nothing else is left."""
+        game = self.game
+        threats = [col for col in self.order
+                   if board.heights[col] < game.rows and game.would_win(board, col, -player)]
+        if threats:
+            moves = threats[:1]
+        else:
+            moves = [col for col in self.order if board.heights[col] < game.rows]
+            if board.is_symmetric():
+                moves = game.distinct_moves(moves)
+        safe = []
+        for col in moves:
+            board.drop(col, player)
+            if not game.would_win(board, col, -player):
+                safe.append(col)
+            board.undo(col)
+        return safe or moves
+
+    def negamax(self, board, player, alpha, beta, empties):
+        game = self.game
+        game.nodes += 1
+        if game.node_limit is not None and game.nodes > game.node_limit:
+            raise SearchAborted
+        if not game.nodes & 255 and game.poll_search():
+            raise SearchAborted
+
+        if empties == 0:
+            return 0
+        rows = game.rows
+        for col in self.order:
+            if board.heights[col] < rows and game.would_win(board, col, player):
+                return empties
+        if empties == 1:
+            return 0
+        # the opponent wins at once against two threats
+        threats = 0
+        for col in self.order:
+            if board.heights[col] < rows and game.would_win(board, col, -player):
+                threats += 1
+        if threats > 1:
+            return -(empties - 1)
+
+        # no win this move: the best still possible is a win next turn
+        best_possible = empties - 2
+        if beta > best_possible:
+            beta = best_possible
+            if alpha >= beta:
+                return beta
+
+        tt = game.tt
+        key, mirrored = board.canonical_key()
+        key ^= SOLVE_KEY
+        tt_move = None
+        if tt is not None:
+            entry = tt.probe(key)
+            if entry is not None:
+                _, value, flag, tt_move = entry
+                if mirrored and tt_move is not None:
+                    tt_move = game.cols - 1 - tt_move
+                if flag == EXACT:
+                    return value
+                if flag == LOWER and value > alpha:
+                    alpha = value
+                elif flag == UPPER and value < beta:
+                    beta = value
+                if alpha >= beta:
+                    return value
+
+        moves = self.candidates(board, player)
+        if tt_move in moves:
+            moves.remove(tt_move)
+            moves.insert(0, tt_move)
+        alpha_orig = alpha
+        best, best_col = -empties, moves[0]
+        for i, col in enumerate(moves):
+            board.drop(col, player)
+            if i == 0:
+                score = -self.negamax(board, -player, -beta, -alpha, empties - 1)
+            else:
+                score = -self.negamax(board, -player, -alpha - 1, -alpha, empties - 1)
+                if alpha < score < beta:
+                    score = -self.negamax(board, -player, -beta, -score, empties - 1)
+            board.undo(col)
+            if score > best:
+                best, best_col = score, col
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+
+        if tt is not None:
+            if best <= alpha_orig:
+                flag = UPPER
+            elif best >= beta:
+                flag = LOWER
+            else:
+                flag = EXACT
+            tt.store(key, empties, best, flag, game.cols - 1 - best_col if mirrored else best_col)
+        return best
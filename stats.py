@@ -0,0 +1,60 @@
+import math
+
+
+class SearchStats:
+    """What one find_best_move call did: work counters, timing and result."""
+
+    def __init__(self):
+        self.nodes = 0
+        self.leaf_evals = 0
+        self.terminal_hits = 0
+        self.tt_hits = 0
+        self.cutoffs = {}  # ply -> beta cutoffs at that ply
+        self.depth = 0  # deepest completed search depth
+        self.max_depth = 0  # deepest ply visited, including unfinished work
+        self.elapsed = 0.0
+        self.best_move = None
+        self.value = None
+        self.pv = []
+        self.exact = None  # exact endgame score (> 0 win, 0 draw) when solved
+        self.threat_nodes = 0  # nodes of the threat-space pre-pass, not in 'nodes'
+        self.done = False  # False for progress snapshots taken mid-search
+
+    @property
+    def nps(self):
+        return self.nodes / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def branching_factor(self):
+        """Effective branching factor: nodes ** (1 / depth)."""
+        if self.depth < 1 or self.nodes < 1:
+            return 0.0
+        return self.nodes ** (1.0 / self.depth)
+
+    def as_dict(self):
+        value = self.value
+        if value is not None and math.isinf(value):
+            value = "inf" if value > 0 else "-inf"
+        return {
+            "nodes": self.nodes,
+            "leaf_evals": self.leaf_evals,
+            "terminal_hits": self.terminal_hits,
+            "tt_hits": self.tt_hits,
+            "cutoffs": [self.cutoffs.get(ply, 0) for ply in range(max(self.cutoffs, default=-1) + 1)],
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "elapsed": self.elapsed,
+            "nps": self.nps,
+            "branching_factor": self.branching_factor,
+            "best_move": self.best_move,
+            "value": value,
+            "pv": list(self.pv),
+            "exact": self.exact,
+            "threat_nodes": self.threat_nodes,
+            "done": self.done,
+        }
+
+    def __repr__(self):
+        return (f"SearchStats(move={self.best_move}, value={self.value}, depth={self.depth}, "
+                f"nodes={self.nodes}, {self.nps:.0f} nps, ebf={self.branching_factor:.2f}, "
+                f"pv={self.pv})")
@@ -0,0 +1,20 @@
+import json
+
+from analyze import parse_positions, run_analysis
+
+
+def test_malformed_record_mid_stream():
+    lines = [
+        '{"id": "a", "moves": [3, 3]}',
+        '{"id": "b", "position": 5}',
+        '{"id": "c", "n": "4", "moves": [3]}',
+        '{"id": "d", "moves": [3, 3, 3, 3, 3, 3, 3]}',
+        "not json {",
+        '{"id": "e", "moves": [2]}',
+    ]
+    results = list(run_analysis(parse_positions(lines), depth=2))
+    assert [r["id"] for r in results] == ["a", "b", "c", "d", 5, "e"]
+    assert "best_move" in results[0] and "best_move" in results[-1]
+    for result in results[1:5]:
+        assert "error" in result
+        json.dumps(result)
@@ -0,0 +1,23 @@
+import pytest
+
+from engine import EngineProcess
+
+
+@pytest.fixture
+def engine():
+    engine = EngineProcess()
+    yield engine
+    engine.close()
+
+
+def test_error_does_not_shift_replies(engine):
+    engine.new_game(depth=2)
+    engine.position([3])
+    with pytest.raises(ValueError):
+        engine.position([0] * 7)
+    # the next command gets its own reply, not the one left over
+    with pytest.raises(ValueError, match="N=9"):
+        engine.new_game(n=9)
+    engine.new_game(depth=2)
+    engine.position([3])
+    assert engine.go(depth=2) in range(7)
@@ -0,0 +1,95 @@
+from logic import SearchAborted
+
+
+class ThreatSearch:
+    """Proves forced wins by threat sequences, with its own node budget.
+
+    Only forcing play is searched: the attacker makes moves that leave an
+    immediate win on the board (blocking the defender's own threat first
+    when there is one), and the defender's only reply to a single threat is
+    to block it. Two threats at once, or a win on top of a block, end the
+    line. Every defender alternative loses at once, so a line found is a
+    proof; failing to find one proves nothing. Attacker move counts are
+    deepened iteratively so short wins are found first.
+    """
+
+    def __init__(self, game, node_budget):
+        self.game = game
+        self.node_budget = node_budget
+        cols = game.cols
+        self.order = sorted(range(cols), key=lambda c: abs(c - (cols - 1) / 2))
+        self.nodes = 0
+        self.failed = {}  # position key -> attacker moves it was refuted with
+        self.cut = False  # an iteration stopped at its depth limit
+
+    def prove(self, board, player):
+        """Winning line for 'player' to move as a list of moves, or None."""
+        board = board.copy()
+        self.nodes = 0
+        self.failed = {}
+        depth = 1
+        try:
+            while True:
+                self.cut = False
+                line = self.attack(board, player, depth)
+                if line is not None:
+                    return line
+                if not self.cut:
+                    return None  # refuted without hitting the limit: no threat win
+                depth += 1
+        except SearchAborted:
+            return None
+
+    def count(self):
+        self.nodes += 1
+        if self.nodes > self.node_budget:
+            raise SearchAborted
+        game = self.game
+        if not self.nodes & 255 and game.stop_event is not None and game.stop_event.is_set():
+            raise SearchAborted
+
+    def playable(self, board):
+        rows = self.game.rows
+        return [col for col in self.order if board.heights[col] < rows]
+
+    def attack(self, board, player, depth):
+        """Line for 'player' to move, making at most 'depth' forcing moves."""
+        self.count()
+        game = self.game
+        moves = self.playable(board)
+        wins = game.winning_moves(board, player, moves)
+        if wins:
+            return [wins[0]]
+        blocks = game.winning_moves(board, -player, moves)
+        if len(blocks) > 1:
+            return None
+        if depth == 0:
+            self.cut = True
+            return None
+        if self.failed.get(board.key, -1) >= depth:
+            return None
+        for col in blocks or moves:
+            board.drop(col, player)
+            line = self.defend(board, player, depth - 1)
+            board.undo(col)
+            if line is not None:
+                return [col] + line
+        self.failed[board.key] = depth
+        return None
+
+    def defend(self, board, player, depth):
+        """Line after 'player' moved, if the move forces the defender."""
+        game = self.game
+        moves = self.playable(board)
+        if game.winning_moves(board, -player, moves):
+            return None
+        threats = game.winning_moves(board, player, moves)
+        if not threats:
+            return None
+        if len(threats) > 1:
+            return threats[:2]  # one gets blocked, the other wins
+        col = threats[0]
+        board.drop(col, -player)
+        line = self.attack(board, player, depth)
+        board.undo(col)
+        return None if line is None else [col] + line
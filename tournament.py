@@ -0,0 +1,276 @@
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from logic import ConnectN, PLAYER_X, PLAYER_O, ROWS, COLS
+
+ELO_SCALE = 400.0
+
+
+def parse_player(spec):
+    """'name:key=value,...' -> (name, engine options).
+
+    Values are read as JSON where possible, so 'search_depth=6' gives an
+    int and 'move_ordering=false' a bool; anything else stays a string.
+    """
+    name, _, rest = spec.partition(":")
+    options = {}
+    for item in filter(None, rest.split(",")):
+        key, _, value = item.partition("=")
+        try:
+            options[key] = json.loads(value)
+        except ValueError:
+            options[key] = value
+    return name, options
+
+
+def schedule(players, games, ns, opening_plies=2, rows=ROWS, cols=COLS, seed=0):
+    """Yield game jobs: every pair of players, both colours on each opening."""
+    rng = random.Random(seed)
+    game_id = 0
+    for n in ns:
+        for a, b in itertools.combinations(players, 2):
+            for _ in range((games + 1) // 2):
+                opening = random_opening(n, rows, cols, opening_plies, rng)
+                for x, o in ((a, b), (b, a)):
+                    yield {"game": game_id, "n": n, "rows": rows, "cols": cols,
+                           "x": x, "o": o, "opening": opening}
+                    game_id += 1
+
+
+def random_opening(n, rows, cols, plies, rng):
+    """Random moves that neither finish the game nor leave a win in one."""
+    game = ConnectN(n=n, rows=rows, cols=cols, tt_size=0, move_ordering=False,
+                    incremental_eval=False)
+    board, player = game.board, PLAYER_X
+    moves = []
+    while len(moves) < plies:
+        safe = []
+        for col in game.valid_moves():
+            if game.would_win(board, col, player):
+                continue
+            game.drop_piece(board, col, player)
+            if not game.winning_moves(board, -player, game.valid_moves()):
+                safe.append(col)
+            game.undo_piece(board, col)
+        if not safe:
+            break
+        col = rng.choice(safe)
+        game.drop_piece(board, col, player)
+        moves.append(col)
+        player = -player
+    return moves
+
+
+def play_game(job, time_limit=None):
+    """Play one game between the two configurations in 'job'; return its record."""
+    (x_name, x_options), (o_name, o_options) = job["x"], job["o"]
+    engines = {}
+    for player, options in ((PLAYER_X, x_options), (PLAYER_O, o_options)):
+        options = dict(options)
+        options.setdefault("seed", job["game"])
+        engines[player] = ConnectN(n=job["n"], rows=job["rows"], cols=job["cols"],
+                                   bot_player=player, **options)
+
+    player = PLAYER_X
+    for col in job["opening"]:
+        for engine in engines.values():
+            engine.play(col, player)
+        player = -player
+
+    referee = engines[PLAYER_X]
+    per_move = []
+    while not referee.game_over():
+        engine = engines[player]
+        start = time.perf_counter()
+        col = engine.find_best_move(time_limit=time_limit)
+        elapsed = time.perf_counter() - start
+        if col is None:
+            break
+        per_move.append({"move": col, "time": elapsed, "nodes": engine.nodes,
+                         "depth": engine.completed_depth})
+        for e in engines.values():
+            e.play(col, player)
+        player = -player
+
+    winner = referee.winner()
+    moves = list(referee.moves)
+    for engine in engines.values():
+        engine.close()
+    result = "x" if winner == PLAYER_X else "o" if winner == PLAYER_O else "draw"
+    return {
+        "game": job["game"],
+        "n": job["n"],
+        "rows": job["rows"],
+        "cols": job["cols"],
+        "x": x_name,
+        "o": o_name,
+        "result": result,
+        "winner": x_name if result == "x" else o_name if result == "o" else None,
+        "opening": job["opening"],
+        "moves": moves,
+        "per_move": per_move,
+    }
+
+
+def run_tournament(jobs, out, workers=1, time_limit=None, log=None):
+    """Play 'jobs', appending each record to 'out' as soon as its game ends.
+
+    Only the running tally is kept in memory, so the record file can be as
+    long as needed. Returns the summary.
+    """
+    tally = Tally()
+
+    def finish(record):
+        out.write(json.dumps(record) + "\n")
+        out.flush()
+        tally.add(record)
+        if log:
+            log(f"game {record['game']:<5} N={record['n']} {record['x']} vs {record['o']}: "
+                f"{record['result']} in {len(record['moves'])} plies")
+
+    if workers <= 1:
+        for job in jobs:
+            finish(play_game(job, time_limit))
+        return tally.summary()
+
+    # keep a bounded number of games in flight instead of submitting all up front
+    with ProcessPoolExecutor(workers) as pool:
+        running = set()
+        for job in jobs:
+            running.add(pool.submit(play_game, job, time_limit))
+            if len(running) >= 2 * workers:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finish(future.result())
+        for future in running:
+            finish(future.result())
+    return tally.summary()
+
+
+# ---------- scoring ----------
+class Tally:
+    """Running win/draw/loss counts per player and per pairing."""
+
+    def __init__(self):
+        self.games = 0
+        self.players = {}  # name -> [wins, draws, losses]
+        self.pairs = {}  # (a, b) with a < b -> score of a, games
+
+    def add(self, record):
+        self.games += 1
+        x, o = record["x"], record["o"]
+        score = {"x": 1.0, "o": 0.0, "draw": 0.5}[record["result"]]
+        for name, s in ((x, score), (o, 1.0 - score)):
+            counts = self.players.setdefault(name, [0, 0, 0])
+            counts[0 if s == 1.0 else 1 if s == 0.5 else 2] += 1
+        a, b = sorted((x, o))
+        pair = self.pairs.setdefault((a, b), [0.0, 0])
+        pair[0] += score if a == x else 1.0 - score
+        pair[1] += 1
+
+    def summary(self):
+        ratings = elo_ratings(self.pairs, list(self.players))
+        players = {}
+        for name, (wins, draws, losses) in self.players.items():
+            games = wins + draws + losses
+            players[name] = {
+                "games": games,
+                "wins": wins,
+                "draws": draws,
+                "losses": losses,
+                "win_rate": wins / games if games else 0.0,
+                "score": (wins + 0.5 * draws) / games if games else 0.0,
+                "elo": ratings[name],
+            }
+        pairs = []
+        for (a, b), (score, games) in sorted(self.pairs.items()):
+            pairs.append({"a": a, "b": b, "games": games, "score": score / games,
+                          "elo_diff": elo_difference(score / games)})
+        return {"games": self.games, "players": players, "pairs": pairs}
+
+
+def elo_difference(score):
+    """Rating difference implied by an expected score, clamped to about +-800."""
+    score = min(max(score, 0.01), 0.99)
+    return -ELO_SCALE * math.log10(1.0 / score - 1.0)
+
+
+def elo_ratings(pairs, names, iterations=200):
+    """Ratings that best explain every pairing's score, averaging 0.
+
+    A simple fixed-point fit: each player moves by the gap between its
+    actual and expected score, until the ratings settle.
+    """
+    ratings = dict.fromkeys(names, 0.0)
+    if len(names) < 2:
+        return ratings
+    for _ in range(iterations):
+        shift = dict.fromkeys(names, 0.0)
+        for (a, b), (score, games) in pairs.items():
+            expected = games / (1.0 + 10 ** ((ratings[b] - ratings[a]) / ELO_SCALE))
+            shift[a] += score - expected
+            shift[b] -= score - expected
+        for name in names:
+            games = sum(g for (a, b), (_, g) in pairs.items() if name in (a, b))
+            if games:
+                ratings[name] += 32.0 * shift[name] / math.sqrt(games)
+        mean = sum(ratings.values()) / len(ratings)
+        ratings = {name: r - mean for name, r in ratings.items()}
+    # perfect scores have no finite fit; keep the spread readable
+    return {name: round(min(max(r, -800.0), 800.0), 1) for name, r in ratings.items()}
+
+
+def print_summary(summary):
+    print(f"{summary['games']} games")
+    ranked = sorted(summary["players"].items(), key=lambda item: -item[1]["elo"])
+    for name, p in ranked:
+        print(f"  {name:<16} elo {p['elo']:+7.1f}  W/D/L {p['wins']}/{p['draws']}/{p['losses']}"
+              f"  win rate {p['win_rate']:.1%}")
+    for pair in summary["pairs"]:
+        print(f"  {pair['a']} vs {pair['b']}: {pair['score']:.1%} over {pair['games']} games "
+              f"({pair['elo_diff']:+.0f})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Self-play tournament between ConnectN configurations.")
+    parser.add_argument("--player", action="append", required=True, metavar="NAME:KEY=VALUE,...",
+                        help="engine configuration, e.g. d6:search_depth=6 (repeat for each player)")
+    parser.add_argument("--games", type=int, default=10, help="games per pairing and N")
+    parser.add_argument("--n", type=int, nargs="+", default=[4])
+    parser.add_argument("--rows", type=int, default=ROWS)
+    parser.add_argument("--cols", type=int, default=COLS)
+    parser.add_argument("--opening-plies", type=int, default=2,
+                        help="random plies played before the engines take over")
+    parser.add_argument("--time", type=float, default=None, help="seconds per move")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="tournament.jsonl", help="per-game JSONL records")
+    parser.add_argument("--summary", help="write the summary JSON here")
+    parser.add_argument("-q", "--quiet", action="store_true")
+    args = parser.parse_args()
+
+    players = [parse_player(spec) for spec in args.player]
+    if len(players) < 2:
+        parser.error("need at least two --player configurations")
+    if len({name for name, _ in players}) != len(players):
+        parser.error("player names must be unique")
+    for n in args.n:
+        if not 3 <= n <= max(args.rows, args.cols):
+            parser.error(f"N={n} does not fit a {args.rows}x{args.cols} board")
+
+    jobs = schedule(players, args.games, args.n, args.opening_plies, args.rows, args.cols, args.seed)
+    start = time.perf_counter()
+    with open(args.out, "w") as out:
+        summary = run_tournament(jobs, out, args.workers, args.time,
+                                 log=None if args.quiet else print)
+    summary["elapsed"] = time.perf_counter() - start
+    print_summary(summary)
+    if args.summary:
+        with open(args.summary, "w") as f:
+            json.dump(summary, f, indent=1)
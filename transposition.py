@@ -0,0 +1,216 @@
+import math
+from array import array
+
+# bound types stored with each entry
+EXACT = 1
+LOWER = 2  # value is a lower bound (search failed high)
+UPPER = 3  # value is an upper bound (search failed low)
+
+
+class TranspositionTable:
+    """Fixed-size hash table of search results keyed by Zobrist hash.
+
+    Entries live in parallel typed arrays (key, value, depth, bound, move,
+    generation) so the table never grows past ``size`` entries. A slot is
+    replaced when it is empty, holds the same position, comes from an
+    older search, or was searched to a depth no greater than the new one.
+    """
+
+    def __init__(self, size=1 << 18):
+        assert size > 0
+        self.size = size
+        self.keys = array("Q", bytes(8 * size))
+        self.values = array("d", bytes(8 * size))
+        self.depths = array("b", bytes(size))
+        self.flags = array("b", bytes(size))  # 0 = empty slot
+        self.moves = array("b", bytes(size))
+        self.ages = array("B", bytes(size))
+        self.generation = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def clear(self):
+        """Drop every entry and zero the counters."""
+        size = self.size
+        self.flags = array("b", bytes(size))
+        self.ages = array("B", bytes(size))
+        self.generation = 0
+        self.reset_stats()
+
+    def new_search(self):
+        """Mark entries from earlier searches as preferred for replacement."""
+        self.generation = (self.generation + 1) & 0xFF
+
+    def probe(self, key):
+        """Return (depth, value, flag, move) for 'key', or None on a miss."""
+        self.probes += 1
+        i = key % self.size
+        if self.flags[i] and self.keys[i] == key:
+            self.hits += 1
+            move = self.moves[i]
+            value = self.values[i]
+            if value.is_integer():
+                value = int(value)
+            return self.depths[i], value, self.flags[i], (None if move < 0 else move)
+        return None
+
+    def store(self, key, depth, value, flag, move):
+        i = key % self.size
+        if self.flags[i]:
+            same = self.keys[i] == key
+            if not same and self.ages[i] == self.generation and self.depths[i] > depth:
+                return  # keep the deeper result from this search
+            if not same:
+                self.evictions += 1
+        self.stores += 1
+        self.keys[i] = key
+        self.values[i] = value
+        self.depths[i] = depth
+        self.flags[i] = flag
+        self.moves[i] = -1 if move is None else move
+        self.ages[i] = self.generation
+
+    def stats(self):
+        return {
+            "size": self.size,
+            "probes": self.probes,
+            "hits": self.hits,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / self.probes if self.probes else 0.0,
+        }
+
+
+# fixed-width entry for the shared table: two 64-bit words per slot,
+# [key ^ data, data] with data = value:32 | depth:8 | flag:8 | move+1:8 | age:8
+_VALUE_INF = (1 << 31) - 1
+HEADER_WORDS = 1  # word 0 holds the shared search generation
+STAT_FIELDS = ("probes", "hits", "stores", "evictions", "nodes")
+
+
+class SharedTranspositionTable:
+    """Lock-free transposition table in a multiprocessing.shared_memory buffer.
+
+    Every slot is two 64-bit words; the first is the key xor-ed with the
+    second, so a slot torn by concurrent writers simply fails the key
+    check on probe instead of returning another position's data. Values
+    are stored as 32-bit integers (infinite scores map to sentinels).
+    Each process keeps its own counters and publishes them into a
+    per-worker stats area with flush_stats().
+    """
+
+    def __init__(self, size=1 << 18, workers=1, name=None, worker_id=0):
+        from multiprocessing import shared_memory
+        self.size = size
+        self.workers = workers
+        self.worker_id = worker_id
+        self.stats_offset = HEADER_WORDS
+        self.table_offset = HEADER_WORDS + workers * len(STAT_FIELDS)
+        nbytes = 8 * (self.table_offset + 2 * size)
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=nbytes)
+            self.owner = True
+        else:
+            self.shm = _attach_shared_memory(name)
+            self.owner = False
+        self.name = self.shm.name
+        self.words = self.shm.buf.cast("Q")
+        self.reset_stats()
+
+    @classmethod
+    def attach(cls, name, size, workers, worker_id):
+        return cls(size, workers, name=name, worker_id=worker_id)
+
+    def reset_stats(self):
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.evictions = 0
+
+    @property
+    def generation(self):
+        return self.words[0]
+
+    def clear(self):
+        self.shm.buf[:] = bytes(self.shm.size)
+        self.reset_stats()
+
+    def new_search(self):
+        self.words[0] = (self.words[0] + 1) & 0xFF
+
+    def probe(self, key):
+        self.probes += 1
+        words = self.words
+        i = self.table_offset + 2 * (key % self.size)
+        data = words[i + 1]
+        if (words[i] ^ data) != key or not (data >> 40) & 0xFF:
+            return None
+        self.hits += 1
+        value = data & 0xFFFFFFFF
+        if value >= 1 << 31:
+            value -= 1 << 32
+        if value == _VALUE_INF:
+            value = math.inf
+        elif value == -_VALUE_INF:
+            value = -math.inf
+        move = ((data >> 48) & 0xFF) - 1
+        return (data >> 32) & 0xFF, value, (data >> 40) & 0xFF, (None if move < 0 else move)
+
+    def store(self, key, depth, value, flag, move):
+        words = self.words
+        i = self.table_offset + 2 * (key % self.size)
+        generation = words[0]
+        old = words[i + 1]
+        if (old >> 40) & 0xFF:
+            same = (words[i] ^ old) == key
+            if not same and (old >> 56) == generation and ((old >> 32) & 0xFF) > depth:
+                return
+            if not same:
+                self.evictions += 1
+        self.stores += 1
+        if value == math.inf:
+            value = _VALUE_INF
+        elif value == -math.inf:
+            value = -_VALUE_INF
+        data = ((int(value) & 0xFFFFFFFF) | (depth & 0xFF) << 32 | flag << 40
+                | ((-1 if move is None else move) + 1) << 48 | generation << 56)
+        words[i + 1] = data
+        words[i] = key ^ data
+
+    def flush_stats(self, nodes=0):
+        """Publish this process's counters into its stats slot."""
+        base = self.stats_offset + self.worker_id * len(STAT_FIELDS)
+        for j, value in enumerate((self.probes, self.hits, self.stores, self.evictions, nodes)):
+            self.words[base + j] = value
+
+    def stats(self):
+        """Counters summed over every worker's published slot."""
+        totals = dict.fromkeys(STAT_FIELDS, 0)
+        for w in range(self.workers):
+            base = self.stats_offset + w * len(STAT_FIELDS)
+            for j, field in enumerate(STAT_FIELDS):
+                totals[field] += self.words[base + j]
+        totals["size"] = self.size
+        totals["hit_rate"] = totals["hits"] / totals["probes"] if totals["probes"] else 0.0
+        return totals
+
+    def close(self):
+        self.words.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _attach_shared_memory(name):
+    from multiprocessing import shared_memory
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # before Python 3.13 there is no 'track'; pool workers share the
+        # creating process's resource tracker, so attaching is harmless
+        return shared_memory.SharedMemory(name=name)